@@ -1,5 +1,6 @@
 from .bins.item import BinItem
 from .bins.group import BinGroup
+from .bins.table import BinTable, BitwiseTable, TransitionTable
 from .bins.type import (
     BinCustom,
     BinSingle,
@@ -23,3 +24,5 @@ from .coverage import CoverPoint, Cross
 from .coverage import CoverGroup
 from .coverage import CoverageModel, CoverageCollector
 from .coverage import compact_index, traverse_type, get_markdown_list
+from .db import CoverageDB, HitIndex, SharedCounters, Checkpoint
+from .trace import TraceWriter
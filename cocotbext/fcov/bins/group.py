@@ -1,8 +1,9 @@
 from __future__ import annotations
 
-from typing import Dict, Iterable
+from typing import Dict, Iterable, List, Tuple
 
 from .item import BinItem
+from .table import BinTable, TransitionTable
 
 
 class BinGroup:
@@ -21,7 +22,9 @@ class BinGroup:
 
     def _to_bin_item(self, bin_info):
         def from_bin_info(bin_info):
-            if (
+            if isinstance(bin_info, str):
+                return None, bin_info, 1
+            elif (
                 isinstance(bin_info, Iterable)
                 and (bin_info[0] is None or isinstance(bin_info[0], str))
                 and len(bin_info) == 2
@@ -166,6 +169,56 @@ class BinGroup:
     def items(self):
         return self.bins.items()
 
+    def bin_names(self) -> List[str]:
+        return [name for v in self.bins.values() for name in v.bin_names()]
+
+    def default_mask(self) -> List[bool]:
+        return [v.is_default() for v in self.bins.values() for _ in range(v.num)]
+
+    def ranges(self) -> List[List[Tuple[int, int]]]:
+        """value ranges (lo, hi) of each bin. default, transition and wildcard bins have no value range"""
+        ranges = [[] for _ in range(self.num)]
+        offset = 0
+        for v in self.bins.values():
+            for lo, hi, ordinal, origin, per in v.intervals(offset):
+                if not per:
+                    ranges[ordinal].append((lo, hi))
+                    continue
+                for i in range((lo - origin) // per, (hi - origin) // per + 1):
+                    start = origin + i * per
+                    ranges[ordinal + i].append((max(lo, start), min(hi, start + per - 1)))
+            offset += v.num
+
+        # adjacent ranges of a bin, e.g. of a list of values, are merged
+        for i, r in enumerate(ranges):
+            merged = []
+            for lo, hi in sorted(r):
+                if merged and lo <= merged[-1][1] + 1:
+                    merged[-1] = (merged[-1][0], max(merged[-1][1], hi))
+                else:
+                    merged.append((lo, hi))
+            ranges[i] = merged
+        return ranges
+
+    def compile(self) -> BinTable:
+        intervals = []
+        default = []
+        transitions = []
+        wildcards = []
+        offset = 0
+        for v in self.bins.values():
+            if v.is_default():
+                default.append(offset)
+            else:
+                intervals += v.intervals(offset)
+                wildcards += v.wildcards(offset)
+                for steps in v.transitions():
+                    assert not any(step.wildcards() for step in steps), "Error!! wildcard transitions are not supported"
+                    transitions.append((offset, [[(lo, hi) for lo, hi, *_ in step.intervals()] for step in steps]))
+            offset += v.num
+        transitions = TransitionTable(transitions) if transitions else None
+        return BinTable(intervals, num=offset, default=default, transitions=transitions, wildcards=wildcards)
+
     def update(self, bins):
         self.bins.update(self._update_bins(bins))
 
@@ -1,6 +1,7 @@
 from __future__ import annotations
 
-from functools import cached_property
+import re
+from functools import cached_property, lru_cache
 from enum import Enum, IntEnum
 
 
@@ -9,6 +10,30 @@ class LanguageType(IntEnum):
     SystemVerilog = 1
 
 
+WILDCARD_PATTERN = re.compile(r"^(\d*)'([bBoOhH])([0-9a-fA-F?xXzZ_]+)$")
+
+
+@lru_cache(maxsize=None)
+def parse_wildcard(item: str):
+    """returns (width, mask, value) of wildcard like 4'b1??0. a value v matches if v & mask == value"""
+    width, base, digits = WILDCARD_PATTERN.match(item.strip()).groups()
+    bits = {"b": 1, "o": 3, "h": 4}[base.lower()]
+    digits = digits.replace("_", "")
+
+    mask = value = 0
+    for digit in digits:
+        mask <<= bits
+        value <<= bits
+        if digit not in "?xXzZ":
+            assert int(digit, 16) < 1 << bits, f"Error!! invalid digit ({digit}) in wildcard ({item})"
+            mask |= (1 << bits) - 1
+            value |= int(digit, 16)
+
+    # same as systemverilog, bits above width are zero, not wildcard
+    width = int(width) if width else len(digits) * bits
+    return width, (mask & ((1 << width) - 1)) | -(1 << width), value & ((1 << width) - 1)
+
+
 # TODO: sort
 # TODO: auto contraction to range
 # TODO: handle overlap value
@@ -59,7 +84,10 @@ class BinItem:
         return isinstance(item, BinItem) and item.next is not None
 
     def _is_type_wildcard(self, item):
-        raise NotImplementedError
+        return isinstance(item, str) and WILDCARD_PATTERN.match(item.strip()) is not None
+
+    def _is_wildcard_bin(self):
+        return any(map(self._is_type_wildcard, self.items))
 
     def _is_transition_bin(self):
         return all(map(self._is_type_transition, self.items))
@@ -88,7 +116,12 @@ class BinItem:
         def is_item_single(item):
             if self._is_type_range_with_step(item):
                 return depth == 0
-            return self._is_type_int(item) or self._is_type_range(item) or self._is_type_transition(item)
+            return (
+                self._is_type_int(item)
+                or self._is_type_range(item)
+                or self._is_type_transition(item)
+                or self._is_type_wildcard(item)
+            )
 
         if is_item_single(items):
             items = [items]
@@ -138,6 +171,9 @@ class BinItem:
                 return item.max
             elif isinstance(item, range):
                 return item.stop - 1
+            elif self._is_type_wildcard(item):
+                width, mask, value = parse_wildcard(item)
+                return value | (((1 << width) - 1) & ~mask)
             else:
                 return item
 
@@ -158,6 +194,8 @@ class BinItem:
                 return item.min
             elif isinstance(item, range):
                 return item.start
+            elif self._is_type_wildcard(item):
+                return parse_wildcard(item)[2]
             else:
                 return item
 
@@ -281,6 +319,9 @@ class BinItem:
                 return len_item_single(item.value)
             elif self._is_type_int(item):
                 return 1
+            elif self._is_type_wildcard(item):
+                width, mask, _ = parse_wildcard(item)
+                return 1 << (width - bin(mask & ((1 << width) - 1)).count("1"))
             else:
                 return len(item)
 
@@ -315,6 +356,9 @@ class BinItem:
             return "others"
         elif len(self.items) == 1 and isinstance(self.items[0], Enum):
             return self.items[0].name
+        elif len(self.items) == 1 and self._is_type_wildcard(self.items[0]):
+            digits = self.items[0].strip().split("'")[1][1:].replace("_", "")
+            return prefix + seperator + re.sub("[?xXzZ]", "x", digits)
 
         range_list = sorted(list({self.min, self.max} - {None}))
 
@@ -322,6 +366,97 @@ class BinItem:
         name += [i.replace("-", "neg") for i in map(lambda x: self._format_int(x, format_int=format), range_list)]
         return seperator.join(name)
 
+    def bin_names(self):
+        if self._num == 1:
+            return [self.name]
+        return [f"{self.name}[{i}]" for i in range(self.num)]
+
+    def index(self, value: int):
+        """returns indices of array bins which include value. (empty if not included)"""
+        if self.is_default() or self._is_transition_bin():
+            return []
+
+        position = 0
+        positions = []
+        for item in self.items:
+            if isinstance(item, Enum):
+                item = item.value
+            if self._is_type_int(item):
+                if item == value:
+                    positions.append(position)
+                position += 1
+            elif self._is_type_wildcard(item):
+                assert self.num == 1, "Error!! array bins of wildcard are not supported"
+                _, mask, wildcard_value = parse_wildcard(item)
+                if value & mask == wildcard_value:
+                    positions.append(position)
+                position += 1
+            else:
+                if value in item:
+                    positions.append(position + item.index(value))
+                position += len(item)
+
+        # same as systemverilog, remaining values belong to the last bin
+        per_bin = max(1, position // self.num)
+        return sorted({min(i // per_bin, self.num - 1) for i in positions})
+
+    def intervals(self, ordinal: int = 0):
+        """returns value intervals (lo, hi, ordinal, origin, per) of bins, whose first bin is ordinal. see BinTable"""
+        if self.is_default() or self._is_transition_bin():
+            return []
+
+        runs = []
+        position = 0
+        for item in self.items:
+            if isinstance(item, Enum):
+                item = item.value
+            if self._is_type_int(item):
+                runs.append((item, item, position))
+                position += 1
+            elif self._is_type_range(item):
+                if len(item) > 0:
+                    runs.append((item.start, item.stop - 1, position))
+                position += len(item)
+            elif self._is_type_wildcard(item):
+                position += 1
+            else:
+                runs += [(v, v, position + i) for i, v in enumerate(item)]
+                position += len(item)
+
+        per_bin = max(1, position // self.num)
+        last_position = self.num * per_bin
+        intervals = []
+        for lo, hi, position in runs:
+            origin = lo - position
+            split = min(hi, origin + last_position - 1)
+            if lo <= split:
+                intervals.append((lo, split, ordinal, origin, per_bin))
+            if max(lo, split + 1) <= hi:
+                intervals.append((max(lo, split + 1), hi, ordinal + self.num - 1, 0, 0))
+        return intervals
+
+    def wildcards(self, ordinal: int = 0):
+        """returns wildcards (mask, value, ordinal) of bins, whose first bin is ordinal. see BinTable"""
+        if self.is_default() or self._is_transition_bin() or not self._is_wildcard_bin():
+            return []
+
+        assert self.num == 1, "Error!! array bins of wildcard are not supported"
+        return [parse_wildcard(item)[1:] + (ordinal,) for item in self.items if self._is_type_wildcard(item)]
+
+    def transitions(self):
+        """returns steps (BinItem) of each transition in a transition bin"""
+        if self.is_default() or not self._is_transition_bin():
+            return []
+
+        sequences = []
+        for item in self.items:
+            steps = []
+            while item is not None:
+                steps.append(item)
+                item = item.next
+            sequences.append(steps)
+        return sequences
+
     def add(self, items):
         self.items += items
 
@@ -381,6 +516,8 @@ class BinItem:
             return f"[{self._format_int(item.start, lang, format)}:{self._format_int(item.stop-1, lang, format)}]"
         elif self._is_type_transition(item):
             return f"({item.as_string(lang, format)})"
+        elif self._is_type_wildcard(item):
+            return item.strip()
         else:
             assert False, f"Error!! Not supported type ({type(item)}) as a single item in BinItem!"
 
@@ -426,6 +563,9 @@ class BinItem:
             offset = self.min % step
             sv_items += f" with (item % {step} == {offset})"
 
+        if self._is_wildcard_bin():
+            keyword = "wildcard " + keyword
+
         if self._num == 0:
             return f"{keyword} {self.name}[] = {sv_items}"
         elif self.num == 1:
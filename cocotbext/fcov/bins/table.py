@@ -0,0 +1,267 @@
+from __future__ import annotations
+
+import numpy as np
+from bisect import bisect_left, bisect_right
+from functools import cached_property
+from itertools import accumulate
+from typing import Iterable, List, Tuple
+
+
+def as_value_array(values) -> np.ndarray:
+    """converts values to int64 array, or object array of python int if some values don't fit in int64"""
+    if not isinstance(values, np.ndarray):
+        try:
+            return np.array(values, dtype=np.int64)
+        except (OverflowError, TypeError):
+            values = np.array(values, dtype=object)
+    if values.dtype.kind in "bi" or (values.dtype.kind == "u" and (values.size == 0 or values.max() < 1 << 63)):
+        return values.astype(np.int64)
+    values = values.astype(object)
+    try:
+        return values.astype(np.int64)
+    except OverflowError:
+        return values
+
+
+class BinTable:
+    def __init__(
+        self,
+        intervals: Iterable = (),
+        num: int = 0,
+        default: Iterable[int] = (),
+        transitions: TransitionTable | None = None,
+        wildcards: Iterable = (),
+    ):
+        """
+        intervals:      value intervals of bins as (lo, hi, ordinal, origin, per).
+                        a value v in [lo, hi] hits ordinal + (v - origin) // per, or ordinal if per is 0
+        num:            number of bins
+        default:        ordinals of default bins, which are hit only if no other bin is hit
+        transitions:    automaton of transition bins, advanced by every indexed value
+        wildcards:      wildcards of bins as (mask, value, ordinal). a value v hits ordinal if v & mask == value
+        """
+        self.num = num
+        self.default = list(default)
+        self.transitions = transitions
+        self.wildcards = list(wildcards)
+
+        # split intervals into sorted, non-overlapping segments [bounds[i], bounds[i + 1])
+        intervals = list(intervals)
+        bounds = sorted({b for lo, hi, *_ in intervals for b in (lo, hi + 1)})
+        segments = [[] for _ in range(max(len(bounds) - 1, 0))]
+        for lo, hi, *payload in intervals:
+            for i in range(bisect_left(bounds, lo), bisect_left(bounds, hi + 1)):
+                segments[i].append(tuple(payload))
+
+        self.bounds = bounds
+        self.offsets = [0, *accumulate(len(s) for s in segments)]
+        self.payloads = [p for s in segments for p in s]
+        self.overlap = any(len(s) > 1 for s in segments) or bool(self.wildcards)
+
+    def __repr__(self):
+        return f"{self.__class__.__name__}(segments={len(self.bounds) - 1}, num={self.num}, default={self.default})"
+
+    def __len__(self):
+        return self.num
+
+    def index(self, value: int) -> List[int]:
+        """returns ordinals of bins which include value"""
+        transition_hit = self.transitions.index(value) if self.transitions else []
+        hit = [ordinal for mask, wildcard, ordinal in self.wildcards if value & mask == wildcard]
+        i = bisect_right(self.bounds, value) - 1
+        if 0 <= i < len(self.offsets) - 1:
+            payloads = self.payloads[self.offsets[i] : self.offsets[i + 1]]
+            hit += [ordinal + (value - origin) // per if per else ordinal for ordinal, origin, per in payloads]
+        if hit:
+            return (sorted(set(hit)) if self.overlap else hit) + transition_hit
+        return self.default + transition_hit
+
+    def reset(self):
+        if self.transitions:
+            self.transitions.reset()
+
+    @cached_property
+    def _arrays(self):
+        try:
+            bounds = np.array(self.bounds, dtype=np.int64)
+            payloads = np.array(self.payloads, dtype=np.int64).reshape(-1, 3)
+        except OverflowError:
+            bounds = np.array(self.bounds, dtype=object)
+            payloads = np.array(self.payloads, dtype=object).reshape(-1, 3)
+        return bounds, np.array(self.offsets, dtype=np.int64), payloads
+
+    def index_many(self, values) -> Tuple[np.ndarray, np.ndarray]:
+        """vectorized index(). returns (rows, ordinals) of all hits, sorted by rows"""
+        values = as_value_array(values)
+        bounds, offsets, payloads = self._arrays
+        if values.dtype == object or bounds.dtype == object:
+            values, bounds = values.astype(object), bounds.astype(object)
+
+        segment = np.searchsorted(bounds, values, side="right") - 1
+        valid = (segment >= 0) & (segment < len(offsets) - 1)
+        segment = np.where(valid, segment, 0)
+        count = np.where(valid, offsets[np.minimum(segment + 1, len(offsets) - 1)] - offsets[segment], 0)
+
+        rows = np.repeat(np.arange(len(values)), count)
+        payload_index = np.repeat(offsets[segment] - (np.cumsum(count) - count), count) + np.arange(len(rows))
+        ordinal, origin, per = payloads[payload_index].T
+        step = (values[rows] - origin) // np.maximum(per, 1)
+        ordinals = (ordinal + np.where(per > 0, step, 0)).astype(np.int64)
+
+        if self.wildcards:
+            if values.dtype != object and any(
+                mask < -(1 << 63) or wildcard >= 1 << 63 for mask, wildcard, _ in self.wildcards
+            ):
+                values = values.astype(object)
+            wildcard_rows = [np.flatnonzero(values & mask == wildcard) for mask, wildcard, _ in self.wildcards]
+            rows = np.concatenate([rows, *wildcard_rows]).astype(np.int64)
+            ordinals = np.concatenate(
+                [ordinals, *(np.full(len(r), o) for r, (*_, o) in zip(wildcard_rows, self.wildcards))]
+            ).astype(np.int64)
+
+        if self.overlap:
+            keys = np.unique(rows * self.num + ordinals)
+            rows, ordinals = keys // self.num, keys % self.num
+        if self.default:
+            missing = np.ones(len(values), dtype=bool)
+            missing[rows] = False
+            missing_rows = np.flatnonzero(missing)
+            rows = np.concatenate([rows] + [missing_rows] * len(self.default))
+            ordinals = np.concatenate([ordinals] + [np.full(len(missing_rows), d) for d in self.default])
+            order = np.argsort(rows, kind="stable")
+            rows, ordinals = rows[order], ordinals[order]
+        if self.transitions:
+            transition_rows, transition_ordinals = self.transitions.index_many(values)
+            rows = np.concatenate([rows, transition_rows])
+            ordinals = np.concatenate([ordinals, transition_ordinals])
+            order = np.argsort(rows, kind="stable")
+            rows, ordinals = rows[order], ordinals[order]
+        return rows, ordinals
+
+
+class TransitionTable:
+    def __init__(self, sequences: Iterable = ()):
+        """
+        sequences:      (ordinal, steps) of transitions, where steps are lists of value intervals (lo, hi) of each step.
+
+        transitions are matched by a deterministic automaton, built lazily from the sets of partially matched steps.
+        once a (state, value class) pair is seen, advancing the automaton is a single dict lookup.
+        """
+        sequences = list(sequences)
+        self.ordinals = [ordinal for ordinal, _ in sequences]
+        self.lengths = [len(steps) for _, steps in sequences]
+
+        # classify values by the set of (sequence, step) including them
+        intervals = [
+            (lo, hi, s, k) for s, (_, steps) in enumerate(sequences) for k, step in enumerate(steps) for lo, hi in step
+        ]
+        bounds = sorted({b for lo, hi, *_ in intervals for b in (lo, hi + 1)})
+        matches = [set() for _ in range(max(len(bounds) - 1, 0))]
+        for lo, hi, s, k in intervals:
+            for i in range(bisect_left(bounds, lo), bisect_left(bounds, hi + 1)):
+                matches[i].add((s, k))
+
+        classes = {frozenset(): 0}
+        self.bounds = bounds
+        self.segment_classes = [classes.setdefault(frozenset(m), len(classes)) for m in matches]
+        self.class_matches = list(classes)
+
+        self._starts = frozenset((s, 0) for s in range(len(sequences)))
+        self._states = {frozenset(): 0}
+        self._state_list = [frozenset()]
+        self._next = dict()
+        self.state = 0
+
+    def __repr__(self):
+        return f"{self.__class__.__name__}(transitions={len(self.ordinals)}, states={len(self._state_list)})"
+
+    def reset(self):
+        self.state = 0
+
+    def classify(self, value: int) -> int:
+        i = bisect_right(self.bounds, value) - 1
+        return self.segment_classes[i] if 0 <= i < len(self.segment_classes) else 0
+
+    def _advance(self, value_class: int) -> List[int]:
+        key = (self.state, value_class)
+        if key not in self._next:
+            active = self._state_list[self.state] | self._starts
+            advanced = {(s, k + 1) for s, k in self.class_matches[value_class] if (s, k) in active}
+            hit = sorted({self.ordinals[s] for s, k in advanced if k == self.lengths[s]})
+            state = frozenset((s, k) for s, k in advanced if k < self.lengths[s])
+            if state not in self._states:
+                self._states[state] = len(self._state_list)
+                self._state_list.append(state)
+            self._next[key] = self._states[state], hit
+        self.state, hit = self._next[key]
+        return hit
+
+    def index(self, value: int) -> List[int]:
+        """advances the automaton by value and returns ordinals of completed transitions"""
+        return list(self._advance(self.classify(value)))
+
+    def index_many(self, values) -> Tuple[np.ndarray, np.ndarray]:
+        values = as_value_array(values)
+        if len(self.bounds) > 0:
+            try:
+                bounds = np.array(self.bounds, dtype=values.dtype)
+            except OverflowError:
+                bounds, values = np.array(self.bounds, dtype=object), values.astype(object)
+            segment = np.searchsorted(bounds, values, side="right") - 1
+            segment_classes = np.array([0, *self.segment_classes, 0], dtype=np.int64)
+            value_classes = segment_classes[np.clip(segment + 1, 0, len(segment_classes) - 1)]
+        else:
+            value_classes = np.zeros(len(values), dtype=np.int64)
+
+        rows = []
+        ordinals = []
+        for row, value_class in enumerate(value_classes.tolist()):
+            for ordinal in self._advance(value_class):
+                rows.append(row)
+                ordinals.append(ordinal)
+        return np.array(rows, dtype=np.int64), np.array(ordinals, dtype=np.int64)
+
+
+class BitwiseTable:
+    def __init__(self, width: int):
+        """
+        width:          number of bits. bit i hits ordinal 2 * i for 0 and 2 * i + 1 for 1
+        """
+        self.width = width
+        self.num = width * 2
+
+    def __repr__(self):
+        return f"{self.__class__.__name__}(width={self.width})"
+
+    def __len__(self):
+        return self.num
+
+    def reset(self):
+        pass
+
+    def index(self, value: int) -> List[int]:
+        return [i * 2 + ((value >> i) & 1) for i in range(self.width)]
+
+    def unpack(self, values) -> np.ndarray:
+        """returns (len(values), width) matrix of bits of values, unpacked from their little-endian bytes"""
+        values = as_value_array(values)
+        nbytes = (self.width + 7) // 8
+        if values.dtype != object and (self.width <= 64 or values.size == 0 or values.min() >= 0):
+            data = np.ascontiguousarray(values, dtype="<i8").view(np.uint8).reshape(-1, 8)
+            data = data[:, :nbytes] if nbytes <= 8 else np.pad(data, ((0, 0), (0, nbytes - 8)))
+        else:
+            mask = (1 << self.width) - 1
+            data = b"".join((int(v) & mask).to_bytes(nbytes, "little") for v in values.tolist())
+            data = np.frombuffer(data, dtype=np.uint8).reshape(-1, nbytes)
+        return np.unpackbits(data, axis=1, count=self.width, bitorder="little")
+
+    def count_many(self, values) -> np.ndarray:
+        """returns (width, 2) matrix of the number of 0 and 1 of each bit"""
+        ones = self.unpack(values).sum(axis=0, dtype=np.int64)
+        return np.stack([len(values) - ones, ones], axis=1)
+
+    def index_many(self, values) -> Tuple[np.ndarray, np.ndarray]:
+        bits = self.unpack(values)
+        rows = np.repeat(np.arange(len(bits)), self.width)
+        ordinals = (np.arange(self.width) * 2 + bits).astype(np.int64).ravel()
+        return rows, ordinals
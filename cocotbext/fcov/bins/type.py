@@ -3,9 +3,10 @@ from __future__ import annotations
 import math
 import numpy as np
 from enum import Enum, IntEnum
-from typing import Dict, Iterable
+from typing import Dict, Iterable, List
 
 from .group import BinGroup
+from .table import BitwiseTable
 
 
 class BinCustom(BinGroup):
@@ -273,6 +274,15 @@ class BinBitwise(BinGroup):
     def __len__(self):
         return self.width * 2
 
+    def bin_names(self) -> List[str]:
+        return [f"{self.prefix}_{i}[{b}]" for i in range(self.width) for b in range(2)]
+
+    def default_mask(self) -> List[bool]:
+        return [False] * len(self)
+
+    def compile(self) -> BitwiseTable:
+        return BitwiseTable(self.width)
+
     def markdown(self, format: str | None = None, shorten: bool | None=False, enum=True):
         return "0, 1 for each bit"
 
@@ -1,18 +1,24 @@
 from __future__ import annotations
 
 import os
+import weakref
+import numpy as np
 import pandas as pd
+from collections import deque
 from copy import deepcopy, copy
 from math import prod
-from typing import Any, Dict, Iterable
-from itertools import chain
+from typing import Any, Callable, Dict, Iterable, List, Tuple
+from itertools import chain, product
+from enum import Enum
 
 import cocotb
 from cocotb.log import SimLog
-from cocotb.triggers import Edge, Event
+from cocotb.triggers import Edge, Event, NextTimeStep, ReadOnly, RisingEdge, Timer
 from cocotb.binary import BinaryValue
+from cocotb.utils import get_sim_time
 
 from .bins.group import BinGroup
+from .bins.table import BitwiseTable, as_value_array
 from .bins.type import BinBitwise, BinOutOfSpec
 
 
@@ -73,6 +79,31 @@ def traverse_type(obj, class_type, flatten):
                     pass
 
 
+def to_int(value) -> int | None:
+    """converts sampled value to int. returns None for unknown values (None, x, z)"""
+    if isinstance(value, Enum):
+        value = value.value
+    elif isinstance(value, str):
+        value = BinaryValue(value)
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def check_on_illegal(on_illegal):
+    if not (on_illegal is None or on_illegal == "error" or callable(on_illegal)):
+        raise ValueError(f"Error!! on_illegal ({on_illegal!r}) should be None, 'error' or a callable")
+
+
+def sim_time(units: str = "ns") -> float | None:
+    """current simulation time, or None outside of simulation"""
+    try:
+        return get_sim_time(units)
+    except RuntimeError:
+        return None
+
+
 def get_markdown_list(key, value, seperator="_", use_name=True):
     markdown_list = []
     if isinstance(value, list):
@@ -120,6 +151,7 @@ class CoverPoint:
         prefix: str = "bin",
         format: str | None = None,
         log_level: str = "INFO",
+        on_illegal: str | Callable | None = None,
     ) -> None:
         """
         bins:           included bins list
@@ -132,6 +164,10 @@ class CoverPoint:
         prefix:         name prefix of bins
         format:         value format (str). {b, o, d, x, h}
         log_level:      log level in cocotb simulation log
+        on_illegal:     action when a sampled value hits illegal bins in python. {None, "error", callable}
+                        - None: only count illegal bins
+                        - error: log and fail with AssertionError
+                        - callable: called as on_illegal(coverpoint, value, illegal bin names, sim time in ns)
         """
         self.log = SimLog(f"cocotbext.fcov.{self.__class__.__name__}")
         self.log.setLevel(log_level)
@@ -155,8 +191,15 @@ class CoverPoint:
         self.name = name
         self.group = group
         self.ref = ref
+        check_on_illegal(on_illegal)
+        self.on_illegal = on_illegal
 
         self._value = None
+        self._handler = None
+        self._driven = False
+        self._counts = None
+        self._generation = 0
+        self._reset_hooks = []
 
     def __copy__(self):
         return self.__class__(
@@ -168,6 +211,7 @@ class CoverPoint:
             ref=self.ref,
             prefix=self.prefix,
             format=self.format,
+            on_illegal=self.on_illegal,
         )
 
     def __deepcopy__(self, memo):
@@ -207,12 +251,13 @@ class CoverPoint:
         if self.ref:
             return self.ref.value
         elif self._value is None:
-            try:
+            if self._handler is not None:
                 return self._handler.value
-            except AttributeError as e:
-                print(e)
-                print(f"- signal name: '{self.signal}'")
-                raise
+            if self._driven:
+                self.log.error(f"CoverPoint {self.name} is driven to the simulator, but not connected to its signal")
+                assert False
+            # not driven to the simulator, e.g. counted only in python
+            return None
         else:
             return self._value
 
@@ -300,6 +345,10 @@ class CoverPoint:
         self.name = name
         self.group = group
 
+    def set_driven(self, driven: bool):
+        """sets whether the covergroup drives the coverpoint to its signal, whose value is read if not set"""
+        self._driven = driven
+
     def connect(self, coverage_instance):
         if self.ref:
             return
@@ -309,6 +358,184 @@ class CoverPoint:
             assert False
         self._handler = getattr(coverage_instance, self.signal)
 
+    # methods for python-side counting
+    def compile(self):
+        self._tables = self.bins.compile(), self.ignore_bins.compile(), self.illegal_bins.compile()
+        self._bin_names = self.bins.bin_names()
+        self._illegal_names = self.illegal_bins.bin_names()
+        self._bin_index = {name: i for i, name in enumerate(self._bin_names)}
+        self._default_mask = np.array(self.bins.default_mask(), dtype=bool)
+
+        # counters of bins, ignore_bins and illegal_bins in one contiguous vector
+        num_bins, num_ignore = self.bins.num, self.ignore_bins.num
+        self._counter = np.zeros(num_bins + num_ignore + self.illegal_bins.num, dtype=np.int64)
+        self._counts = self._counter[:num_bins]
+        self._ignore_counts = self._counter[num_bins : num_bins + num_ignore]
+        self._illegal_counts = self._counter[num_bins + num_ignore :]
+
+    def _get_counter(self) -> np.ndarray:
+        if self._counts is None:
+            self.compile()
+        return self._counter
+
+    @property
+    def generation(self) -> int:
+        """bumped whenever counters may change, e.g. to find counters changed since the last checkpoint"""
+        return self._generation
+
+    def add_reset_hook(self, hook: Callable[[CoverPoint], None]):
+        """adds a callback called with the coverpoint at reset(), before its counters are cleared"""
+        self._reset_hooks.append(hook)
+
+    def reset(self):
+        self._get_counter()
+        for hook in self._reset_hooks:
+            hook(self)
+        self._counter[:] = 0
+        self._generation += 1
+        for table in self._tables:
+            table.reset()
+
+    def snapshot(self) -> np.ndarray:
+        """returns a copy of counters of bins, ignore_bins and illegal_bins"""
+        return self._get_counter().copy()
+
+    def merge(self, other: CoverPoint | np.ndarray):
+        """adds counters of other coverpoint (or its snapshot) to own counters"""
+        counter = other.snapshot() if isinstance(other, CoverPoint) else other
+        assert len(counter) == len(self._get_counter()), (
+            f"Error!! counters of {self.name} ({len(self._counter)}) can't be merged with different size"
+            f" ({len(counter)})"
+        )
+        self._counter += counter
+        self._generation += 1
+
+    def sample(self, value) -> List[int]:
+        """counts value into bins and returns ordinals of hit bins"""
+        value = to_int(value)
+        if value is None:
+            return []
+        self._get_counter()
+        self._generation += 1
+
+        # empty hits are skipped, as indexing numpy arrays by a list is slow for a single value
+        bins_table, ignore_table, illegal_table = self._tables
+        illegal = illegal_table.index(value) if illegal_table.num else []
+        if illegal:
+            self._illegal_counts[illegal] += 1
+            if self.on_illegal is not None:
+                self._report_illegal(value, illegal)
+        ignore = ignore_table.index(value) if ignore_table.num else []
+        if ignore:
+            self._ignore_counts[ignore] += 1
+        if illegal or ignore:
+            return []
+
+        hit = bins_table.index(value)
+        if hit:
+            self._counts[hit] += 1
+        return hit
+
+    def sample_many(self, values, return_hits: bool = True) -> Tuple[np.ndarray, np.ndarray] | None:
+        """
+        vectorized sample(). counts array of values and returns (rows, ordinals) of hit bins.
+        if return_hits is False, returns None and bitwise bins are counted per bit without listing hits.
+        """
+        values = as_value_array(values)
+        self._get_counter()
+        self._generation += 1
+
+        bins_table, ignore_table, illegal_table = self._tables
+        excluded = np.zeros(len(values), dtype=bool)
+        rows, ordinals = illegal_table.index_many(values)
+        excluded[rows] = True
+        self._illegal_counts += np.bincount(ordinals, minlength=len(self._illegal_counts))
+        if len(rows) and self.on_illegal is not None:
+            illegal_rows, starts = np.unique(rows, return_index=True)
+            for row, illegal in zip(illegal_rows.tolist(), np.split(ordinals, starts[1:])):
+                self._report_illegal(int(values[row]), illegal.tolist(), row=row)
+        rows, ordinals = ignore_table.index_many(values)
+        excluded[rows] = True
+        self._ignore_counts += np.bincount(ordinals, minlength=len(self._ignore_counts))
+
+        if not return_hits and isinstance(bins_table, BitwiseTable):
+            self._counts += bins_table.count_many(values[~excluded]).ravel()
+            return None
+
+        # as sample(), excluded values are not indexed, so they don't advance transitions
+        included = np.flatnonzero(~excluded)
+        rows, ordinals = bins_table.index_many(values[included])
+        rows = included[rows]
+        self._counts += np.bincount(ordinals, minlength=len(self._counts))
+        return rows, ordinals
+
+    def check(self, value) -> List[int]:
+        """checks only illegal bins, without counting. returns ordinals of hit illegal bins"""
+        value = to_int(value)
+        if value is None:
+            return []
+        self._get_counter()
+
+        illegal = self._tables[2].index(value)
+        if illegal and self.on_illegal is not None:
+            self._report_illegal(value, illegal)
+        return illegal
+
+    def _report_illegal(self, value: int, illegal: List[int], row: int | None = None):
+        names = [self._illegal_names[i] for i in illegal]
+        time = sim_time()
+        if self.on_illegal == "error":
+            message = f"Illegal value {value} of CoverPoint {self.name} hits illegal bins {names}"
+            if time is not None:
+                message += f" at {time} ns"
+            if row is not None:
+                message += f" (row {row} of sampled values)"
+            self.log.error(message)
+            assert False, message
+        self.on_illegal(self, value, names, time)
+
+    @property
+    def counts(self) -> np.ndarray:
+        self._get_counter()
+        return self._counts
+
+    @property
+    def bit_counts(self) -> np.ndarray:
+        """(width, 2) view of counters of bitwise bins. [i, 0] and [i, 1] count 0 and 1 of bit i"""
+        assert self.is_bitwise_bin, f"Error!! {self.name} is not a bitwise coverpoint"
+        return self.counts.reshape(-1, 2)
+
+    @property
+    def bin_names(self) -> List[str]:
+        self._get_counter()
+        return self._bin_names
+
+    @property
+    def default_mask(self) -> np.ndarray:
+        self._get_counter()
+        return self._default_mask
+
+    def ordinal(self, name: str) -> int:
+        self._get_counter()
+        return self._bin_index[name]
+
+    @property
+    def hits(self) -> Dict[str, int]:
+        self._get_counter()
+        return dict(zip(self._bin_names, self._counts.tolist()))
+
+    @property
+    def illegal_hits(self) -> Dict[str, int]:
+        self._get_counter()
+        return dict(zip(self._illegal_names, self._illegal_counts.tolist()))
+
+    def coverage(self) -> float | None:
+        """percentage of hit bins except default bins. None if there is no bin to be covered"""
+        counts = self.counts[~self._default_mask]
+        if len(counts) == 0:
+            return None
+        return 100 * np.count_nonzero(counts) / len(counts)
+
     @property
     def is_bitwise_bin(self):
         return isinstance(self.bins, BinBitwise)
@@ -372,15 +599,30 @@ class Cross:
         coverpoints: Iterable[CoverPoint],
         name: str | None = None,
         group: str | None = None,
+        dense_limit: int = 1 << 20,
     ) -> None:
         """
         coverpoints:    coverpoints list to be crossed
         name:           name of cross
         group:          name of covergroup
+        dense_limit:    max number of cross bins kept as a dense array. larger crosses keep only hit bins.
         """
         self.coverpoints = coverpoints
         self.name = name
         self.group = group
+        self.dense_limit = dense_limit
+
+        self._counts = None
+        self._generation = 0
+        self._reset_hooks = []
+
+    def __copy__(self):
+        return self.__class__(
+            coverpoints=self.coverpoints,
+            name=self.name,
+            group=self.group,
+            dense_limit=self.dense_limit,
+        )
 
     def __repr__(self):
         coverpoints = ", ".join(hex(id(cp)) if cp.name is None else cp.name for cp in self.coverpoints)
@@ -404,6 +646,157 @@ class Cross:
         self.name = name
         self.group = group
 
+    # methods for python-side counting
+    def compile(self):
+        self._dims = tuple(cp.num for cp in self.coverpoints)
+        self._size = prod(self._dims)
+        self._default_masks = [cp.default_mask for cp in self.coverpoints]
+        self._dense = self._size <= self.dense_limit
+        if self._dense:
+            self._counts = np.zeros(self._size, dtype=np.int64)
+        else:
+            self._counts = dict()
+
+    def _get_counts(self) -> np.ndarray | Dict[int, int]:
+        if self._counts is None:
+            self.compile()
+        return self._counts
+
+    @property
+    def is_dense(self) -> bool:
+        if self._counts is None:
+            return prod(cp.num for cp in self.coverpoints) <= self.dense_limit
+        return self._dense
+
+    def _ravel(self, ordinals: List[np.ndarray]) -> np.ndarray:
+        if self._size < 1 << 63:
+            return np.ravel_multi_index(ordinals, self._dims) if ordinals else np.zeros(0, dtype=np.int64)
+        keys = np.zeros(len(ordinals[0]), dtype=object)
+        for ordinal, dim in zip(ordinals, self._dims):
+            keys = keys * dim + ordinal.astype(object)
+        return keys
+
+    def _ravel_one(self, ordinals: Iterable[int]) -> int:
+        key = 0
+        for ordinal, dim in zip(ordinals, self._dims):
+            key = key * dim + ordinal
+        return key
+
+    def _unravel(self, key: int) -> List[int]:
+        ordinals = []
+        for dim in reversed(self._dims):
+            key, ordinal = divmod(key, dim)
+            ordinals.append(ordinal)
+        return ordinals[::-1]
+
+    @property
+    def generation(self) -> int:
+        """bumped whenever counters may change, e.g. to find counters changed since the last checkpoint"""
+        return self._generation
+
+    def _add(self, keys: np.ndarray):
+        counts = self._get_counts()
+        self._generation += 1
+        if self._dense:
+            counts += np.bincount(keys, minlength=self._size)
+        else:
+            keys, key_counts = np.unique(keys, return_counts=True)
+            for k, c in zip(keys.tolist(), key_counts.tolist()):
+                counts[k] = counts.get(k, 0) + c
+
+    def sample(self, hits: List[List[int]]):
+        """counts every combination of hit bins of coverpoints. default bins are not crossed"""
+        counts = self._get_counts()
+        self._generation += 1
+        hits = [[i for i in hit if not mask[i]] for hit, mask in zip(hits, self._default_masks)]
+        for ordinals in product(*hits):
+            key = self._ravel_one(ordinals)
+            if self._dense:
+                counts[key] += 1
+            else:
+                counts[key] = counts.get(key, 0) + 1
+
+    def sample_many(self, hits: List[Tuple[np.ndarray, np.ndarray]]):
+        """vectorized sample(). hits are (rows, ordinals) of coverpoints, sorted by rows"""
+        self._get_counts()
+        hits = [
+            (rows[~mask[ordinals]], ordinals[~mask[ordinals]])
+            for (rows, ordinals), mask in zip(hits, self._default_masks)
+        ]
+
+        rows, ordinals = hits[0][0], [hits[0][1]]
+        for rows_next, ordinals_next in hits[1:]:
+            lo = np.searchsorted(rows_next, rows, side="left")
+            count = np.searchsorted(rows_next, rows, side="right") - lo
+            index = np.repeat(lo - (np.cumsum(count) - count), count) + np.arange(count.sum())
+            rows = np.repeat(rows, count)
+            ordinals = [np.repeat(i, count) for i in ordinals] + [ordinals_next[index]]
+        self._add(self._ravel(ordinals))
+
+    def add_reset_hook(self, hook: Callable[[Cross], None]):
+        """adds a callback called with the cross at reset(), before its counters are cleared"""
+        self._reset_hooks.append(hook)
+
+    def reset(self):
+        self._get_counts()
+        for hook in self._reset_hooks:
+            hook(self)
+        self.compile()
+        self._generation += 1
+
+    def snapshot(self) -> np.ndarray | Dict[int, int]:
+        return self._get_counts().copy()
+
+    def merge(self, other: Cross | np.ndarray | Dict[int, int]):
+        counts = other.snapshot() if isinstance(other, Cross) else other
+        self._get_counts()
+        self._generation += 1
+        if self._dense:
+            assert len(counts) == self._size, (
+                f"Error!! counters of {self.name} ({self._size}) can't be merged with different size ({len(counts)})"
+            )
+            self._counts += counts
+        else:
+            for k, c in counts.items():
+                self._counts[k] = self._counts.get(k, 0) + c
+
+    @property
+    def hits(self) -> Dict[Tuple[str, ...], int]:
+        """counts of hit cross bins keyed by bin names of coverpoints"""
+        counts = self._get_counts()
+        if self.is_dense:
+            counts = {k: counts[k] for k in np.flatnonzero(counts).tolist()}
+        names = [cp.bin_names for cp in self.coverpoints]
+        return {
+            tuple(n[i] for n, i in zip(names, self._unravel(k))): int(c)
+            for k, c in sorted(counts.items())
+        }
+
+    def holes(self) -> Iterable[Tuple[str, ...]]:
+        """yields bin names of cross bins which are not hit yet"""
+        counts = self._get_counts()
+        names = [cp.bin_names for cp in self.coverpoints]
+        if self.is_dense:
+            crossable = np.ones(self._dims, dtype=bool)
+            for axis, mask in enumerate(self._default_masks):
+                crossable &= ~mask.reshape([-1 if i == axis else 1 for i in range(len(self._dims))])
+            for key in np.flatnonzero((counts == 0) & crossable.ravel()).tolist():
+                yield tuple(n[i] for n, i in zip(names, self._unravel(key)))
+        else:
+            candidates = [np.flatnonzero(~mask).tolist() for mask in self._default_masks]
+            for ordinals in product(*candidates):
+                if self._ravel_one(ordinals) not in counts:
+                    yield tuple(n[i] for n, i in zip(names, ordinals))
+
+    def coverage(self) -> float | None:
+        """percentage of hit cross bins, except cross bins of default bins"""
+        counts = self._get_counts()
+        num = prod(int(np.count_nonzero(~mask)) for mask in self._default_masks)
+        if num == 0:
+            return None
+        hit = np.count_nonzero(counts) if self.is_dense else len(counts)
+        return 100 * hit / num
+
     def sv_declare(self):
         cross = {self.name: []}
         for cp in self.coverpoints:
@@ -442,25 +835,124 @@ class CoverGroup:
     def __new__(cls, *args, **kwargs):
         obj = super().__new__(cls)
         obj._copy_coverpoints()
+        # defaults of options and states, also for covergroups whose __init__ doesn't call CoverGroup.__init__
+        obj._set_options()
+        obj._init_state()
         return obj
 
-    def __init__(self, name: str | None = None, log_level: str = "INFO"):
+    def __init__(
+        self,
+        name: str | None = None,
+        log_level: str = "INFO",
+        backend: str = "simulator",
+        on_illegal: str | Callable | None = None,
+        queue_size: int | None = None,
+        queue_policy: str = "block",
+        drive_mode: str = "signal",
+        fifo_depth: int = 16,
+    ):
         """
         name:           name of covergroup
         log_level:      log level in cocotb simulation log
+        backend:        where bins are counted. {simulator, python, both}
+                        - simulator: drive sampled values to the systemverilog covergroup
+                        - python: count bins in python without any simulator access
+                        - both: count bins in python and drive the systemverilog covergroup
+        on_illegal:     action of coverpoints when a sampled value hits illegal bins. see CoverPoint.
+                        illegal bins are checked in python at sample() even with simulator backend.
+        queue_size:     max number of samples waiting to be driven to the simulator. unbounded if None
+        queue_policy:   what to do with a new sample when the queue is full. {block, drop, coalesce}
+                        - block: sample_async() waits for a free slot. sample() fails
+                        - drop: the oldest queued sample is dropped
+                        - coalesce: the newest queued sample is replaced by the new one
+        drive_mode:     how sampled values are driven to the simulator. {signal, packed, fifo}
+                        - signal: write each coverpoint signal
+                        - packed: write one packed vector, sliced into coverpoint signals in systemverilog
+                        - fifo: write up to fifo_depth packed vectors at once, sampled in a loop in systemverilog
+        fifo_depth:     max number of samples driven at once with fifo drive_mode
         """
         self.set_name(name)
 
         self.log = SimLog(f"cocotbext.fcov.{self.__class__.__name__}")
         self.log.setLevel(log_level)
 
+        self._set_options(backend, on_illegal, queue_size, queue_policy, drive_mode, fifo_depth)
+
+    def _set_options(
+        self,
+        backend: str = "simulator",
+        on_illegal: str | Callable | None = None,
+        queue_size: int | None = None,
+        queue_policy: str = "block",
+        drive_mode: str = "signal",
+        fifo_depth: int = 16,
+    ):
+        assert backend in [
+            "simulator",
+            "python",
+            "both",
+        ], f"Error!! backend ({backend}) should be simulator, python or both"
+        self.backend = backend
+        # where bins are counted at runtime, which can differ from backend when connected without instance
+        self._count_in_python = backend != "simulator"
+        self._drive_simulator = backend != "python"
+
+        assert queue_size is None or queue_size > 0, f"Error!! queue_size ({queue_size}) should be positive"
+        assert queue_policy in [
+            "block",
+            "drop",
+            "coalesce",
+        ], f"Error!! queue_policy ({queue_policy}) should be block, drop or coalesce"
+        self.queue_size = queue_size
+        self.queue_policy = queue_policy
+
+        assert drive_mode in [
+            "signal",
+            "packed",
+            "fifo",
+        ], f"Error!! drive_mode ({drive_mode}) should be signal, packed or fifo"
+        assert fifo_depth > 0, f"Error!! fifo_depth ({fifo_depth}) should be positive"
+        self.drive_mode = drive_mode
+        self.fifo_depth = fifo_depth
+
+        check_on_illegal(on_illegal)
+        if on_illegal is not None:
+            for _, v, _ in self._traverse_coverpoint():
+                v.on_illegal = on_illegal
+
+    def _init_state(self):
         self._sample_handler = None
         self._sample_thread = None
+        self._sample_on_thread = None
+        self._packed_handler = None
+        self._packed_value = None
+        self._fifo_handler = None
+        self._fifo_count_handler = None
+        self._init_sample_state()
+
+        # set by CoverageModel and TraceWriter through share_sample() and set_trace()
+        self._shared_sample = None
+        self._trace = None
+
+        # caches of coverpoints and crosses, built at connect() or on first use
+        self._python_only = None
+        self._connected_coverpoints = None
+        self._connected_crosses = None
+
+    def _init_sample_state(self):
         self._sample_event = Event()
-        self._sample_values = []
-        self._last_drive_values = None
+        self._sample_space = Event()
+        self._sample_values = deque()
+        self.queue_high_water = 0
+        self.queue_dropped = 0
 
-        self._connected_coverpoints = None
+        # last driven value of each coverpoint signal, by id of coverpoint
+        self._last_drive_values = dict()
+        self.drive_skipped = 0
+
+        # number of sampled values, and callbacks taking the number of new samples
+        self.samples = 0
+        self._sample_hooks = []
 
     def _copy_coverpoints(self):
         cp_map = dict()
@@ -492,9 +984,13 @@ class CoverGroup:
                 new_cross = copy_cross(v)
                 setattr(self, k, new_cross)
 
+        self._connected_coverpoints = None
+        self._connected_crosses = None
+
     def __deepcopy__(self, memo):
         obj = copy(self)
         obj._copy_coverpoints()
+        obj._init_sample_state()
         return obj
 
     def __str__(self):
@@ -533,25 +1029,95 @@ class CoverGroup:
                 name = v.name
             v.set_name(name, self.name)
 
-    def connect(self, coverage_instance):
-        if not hasattr(coverage_instance, self.sample_name):
+    def connect(self, coverage_instance, standalone: bool = True):
+        """
+        coverage_instance:  systemverilog instance of coverage model. if None, nothing is driven to the simulator
+        standalone:         if True, covergroups connected to no instance count in python whatever their backend is,
+                            e.g. without simulator. if False, only covergroups counting in python keep counting
+        """
+        self._count_in_python = self.backend != "simulator"
+        self._drive_simulator = self.backend != "python"
+        for _, v, _ in self._traverse_coverpoint():
+            v.set_driven(False)
+        if coverage_instance is None:
+            self._count_in_python = self._count_in_python or standalone
+            self._drive_simulator = False
+            if self._sample_thread:
+                self._sample_thread.kill()
+                self._sample_thread = None
+        if not self._drive_simulator:
+            return
+
+        shared_sample = self._shared_sample
+        if shared_sample is None and not hasattr(coverage_instance, self.sample_name):
             self.log.error(f"No sample signal {self.sample_name} in CoverGroup {self.name}")
             assert False
 
-        for _, v, _ in self._traverse_coverpoint():
-            v.connect(coverage_instance)
+        self._python_only = self._python_only_coverpoints()
+        self._last_drive_values = dict()
+        if self.drive_mode in ["packed", "fifo"]:
+            signals = [self.packed_name] if self.drive_mode == "packed" else [self.fifo_name, self.fifo_count_name]
+            for signal in signals:
+                if not hasattr(coverage_instance, signal):
+                    self.log.error(f"No {self.drive_mode} signal {signal} in CoverGroup {self.name}")
+                    assert False
+            if self.drive_mode == "packed":
+                self._packed_handler = getattr(coverage_instance, self.packed_name)
+            else:
+                self._fifo_handler = getattr(coverage_instance, self.fifo_name)
+                self._fifo_count_handler = getattr(coverage_instance, self.fifo_count_name)
+            layout = self._packed_layout()
+            self._packed_slices = {id(v): (offset, width) for v, offset, width in layout}
+            self._packed_width = sum(width for _, _, width in layout)
+            # nothing is driven yet, so the first packed vector is always written
+            self._packed_value = None
+        else:
+            for _, v, _ in self._traverse_coverpoint():
+                if id(v) not in self._python_only:
+                    v.set_driven(True)
+                    v.connect(coverage_instance)
         self._connected_coverpoints = dict(self._traverse_coverpoint(flatten=False))
+        self._connected_crosses = list(self._traverse_cross())
 
         if self._sample_thread:
             self._sample_thread.kill()
-        self._sample_handler = getattr(coverage_instance, self.sample_name)
-        self._sample_thread = cocotb.start_soon(self._sample())
+            self._sample_thread = None
+        # with a sample signal shared in CoverageModel, the model drives queued samples
+        if shared_sample is None:
+            self._sample_handler = getattr(coverage_instance, self.sample_name)
+            self._sample_thread = cocotb.start_soon(self._sample())
+
+    def _python_only_coverpoints(self) -> set:
+        """ids of bitwise coverpoints counted only in python, which are not generated in systemverilog"""
+        if self.backend == "simulator":
+            return set()
+        coverpoints = [v for _, v, _ in self._traverse_coverpoint()]
+        simulated_refs = {id(v.ref) for v in coverpoints if v.ref and not v.is_bitwise_bin}
+        return {id(v) for v in coverpoints if v.is_bitwise_bin and id(v) not in simulated_refs}
+
+    def _packed_layout(self) -> List[Tuple[CoverPoint, int, int]]:
+        """(coverpoint, offset, width) of coverpoint signals in the packed vector, from lsb"""
+        python_only = self._python_only_coverpoints()
+        layout = []
+        offset = 0
+        for _, v, _ in self._traverse_coverpoint():
+            if v.ref is None and id(v) not in python_only:
+                width = 1 if v.is_out_of_spec else v.width
+                layout.append((v, offset, width))
+                offset += width
+        return layout
 
     def _get_connected_coverpoints(self):
         if self._connected_coverpoints is None:
             self._connected_coverpoints = dict(self._traverse_coverpoint(flatten=False))
         return self._connected_coverpoints
 
+    def _get_connected_crosses(self) -> List[Tuple[str, Cross, int | None]]:
+        # kept as (name, cross, index) tuples, so that traversing crosses doesn't find them again
+        if self._connected_crosses is None:
+            self._connected_crosses = list(self._traverse_cross())
+        return self._connected_crosses
+
     def get(self) -> Dict:
         cp_map = self._get_connected_coverpoints()
 
@@ -583,23 +1149,65 @@ class CoverGroup:
 
     def _drive(self, values: Dict = dict(), **kwargs):
         values.update(kwargs)
-        try:
-            if values == self._last_drive_values:
-                return
-        except ValueError:
-            pass
 
         cp_map = self._get_connected_coverpoints()
-        self._last_drive_values = values
+        if self._python_only is None:
+            self._python_only = self._python_only_coverpoints()
 
+        cp_values = []
         for k, v in cp_map.items():
             if isinstance(v, list):
                 k_value = values.get(k, [None] * len(v))
                 assert len(v) == len(k_value), f"Length of values ({len(v)}) is not same to CoverPoint {k} ({len(v)})"
-                for (_, cpi), valuei in zip(v, k_value):
-                    cpi._drive(valuei)
+                cp_values += [(cpi, valuei) for (_, cpi), valuei in zip(v, k_value)]
             else:
-                v._drive(values.get(k, None))
+                cp_values.append((v, values.get(k, None)))
+        cp_values = [(cp, value) for cp, value in cp_values if id(cp) not in self._python_only]
+        cp_values = self._changed_values(cp_values)
+
+        if self.drive_mode == "signal":
+            for cp, value in cp_values:
+                cp._drive(value)
+            return
+
+        packed_value = self._pack(cp_values)
+        if self.drive_mode == "packed" and packed_value != self._packed_value:
+            self._packed_handler.value = packed_value
+        self._packed_value = packed_value
+
+    def _changed_values(self, cp_values: List[Tuple[CoverPoint, Any]]) -> List[Tuple[CoverPoint, Any]]:
+        """returns (coverpoint having signal, value) whose value is different from the last driven value"""
+        changed = []
+        for cp, value in cp_values:
+            if value is None:
+                continue
+            while cp.ref:
+                cp = cp.ref
+
+            last_value = self._last_drive_values.get(id(cp))
+            try:
+                unchanged = last_value is not None and bool(last_value == value)
+            except ValueError:
+                unchanged = False
+            if unchanged:
+                self.drive_skipped += 1
+                continue
+
+            self._last_drive_values[id(cp)] = value
+            changed.append((cp, value))
+        return changed
+
+    def _pack(self, cp_values: List[Tuple[CoverPoint, Any]]) -> int:
+        """returns the last packed vector updated with values of coverpoints"""
+        packed_value = self._packed_value or 0
+        for cp, value in cp_values:
+            value = to_int(value)
+            if value is None or id(cp) not in self._packed_slices:
+                continue
+            offset, width = self._packed_slices[id(cp)]
+            mask = ((1 << width) - 1) << offset
+            packed_value = (packed_value & ~mask) | ((value << offset) & mask)
+        return packed_value
 
     def __call__(self, **kwargs):
         self.set(values=dict(), **kwargs)
@@ -610,20 +1218,270 @@ class CoverGroup:
         while True:
             await self._sample_event.wait()
             while self._sample_values:
-                self._drive(self._sample_values.pop(0))
+                self._drive_next()
                 self._sample_handler.value = handler_value = not handler_value
                 await Edge(self._sample_handler)
             self._sample_event.clear()
 
+    def _drive_next(self):
+        """drives the next queued sample, or next fifo_depth samples with fifo drive_mode"""
+        if self.drive_mode == "fifo":
+            self._drive_fifo()
+        else:
+            self._drive(self._sample_values.popleft())
+        self._sample_space.set()
+
+    def _drive_fifo(self):
+        """drives up to fifo_depth queued samples at once"""
+        fifo_value = 0
+        count = 0
+        while self._sample_values and count < self.fifo_depth:
+            self._drive(self._sample_values.popleft())
+            fifo_value |= self._packed_value << (count * self._packed_width)
+            count += 1
+        self._fifo_handler.value = fifo_value
+        self._fifo_count_handler.value = count
+
+    def _count(self, values: Dict):
+        cp_map = self._get_connected_coverpoints()
+
+        hits = dict()
+        for k, v in cp_map.items():
+            if isinstance(v, list):
+                for (_, cpi), valuei in zip(v, values.get(k, [None] * len(v))):
+                    hits[id(cpi)] = cpi.sample(valuei)
+            else:
+                hits[id(v)] = v.sample(values.get(k, None))
+
+        for _, x, _ in self._get_connected_crosses():
+            x.sample([hits[id(cp)] for cp in x.coverpoints])
+
+    def _check(self, values: Dict):
+        for k, v in self._get_connected_coverpoints().items():
+            if isinstance(v, list):
+                for (_, cpi), valuei in zip(v, values.get(k, [None] * len(v))):
+                    if cpi.on_illegal is not None:
+                        cpi.check(valuei)
+            elif v.on_illegal is not None:
+                v.check(values.get(k, None))
+
     def sample(self):
-        self._sample_values.append(self.get())
-        self._sample_event.set()
+        self._sample_with(self.get())
+
+    def _sample_with(self, values: Dict, notify: bool = True):
+        if self._count_in_python:
+            self._count(values)
+        else:
+            self._check(values)
+        if self._drive_simulator:
+            self._enqueue(values, notify)
+        if self._trace is not None:
+            self._trace.record(self, values)
+        self._notify_sample(1)
+
+    def _notify_sample(self, num: int):
+        self.samples += num
+        for hook in self._sample_hooks:
+            hook(num)
+
+    def add_sample_hook(self, hook: Callable[[int], None]):
+        """adds a callback called with the number of new samples, after they are sampled"""
+        self._sample_hooks.append(hook)
+
+    def set_trace(self, trace):
+        """sets a trace writer (see TraceWriter) recording sampled values, or None to stop recording"""
+        self._trace = trace
+
+    def share_sample(self, signal: str | None):
+        """sets a bit of the sample vector shared in CoverageModel, or None to use own sample signal"""
+        self._shared_sample = signal
+
+    def set_sample_event(self, event: Event):
+        """sets the event notified when samples are queued, e.g. of CoverageModel driving the shared sample vector"""
+        self._sample_event = event
+
+    def sample_on(self, clock, guard=None, read_only: bool = False, **signals):
+        """
+        samples signals on every rising edge of clock in a coroutine, without set() and sample().
+        clock:          clock signal
+        guard:          samples only if guard is true, like iff in systemverilog.
+                        a signal, or a callable taking a dict of sampled values as int (None for x/z)
+        read_only:      samples after the signals are settled in the ReadOnly phase, instead of at the rising edge
+        signals:        signals keyed by coverpoint name. for a list of coverpoints, a sequence of signals.
+        """
+        cp_map = self._get_connected_coverpoints()
+        for k, v in signals.items():
+            if k not in cp_map:
+                self.log.error(f"CoverPoint {k} is not found in CoverGroup ({self.name}).")
+                assert False
+            if isinstance(cp_map[k], list):
+                assert len(cp_map[k]) == len(v), f"Length of signals ({len(v)}) is not same to CoverPoint {k}"
+
+        if self._sample_on_thread:
+            self._sample_on_thread.kill()
+        self._sample_on_thread = cocotb.start_soon(self._sample_on(clock, guard, read_only, signals))
+        return self._sample_on_thread
+
+    def _read_signals(self, handles: List, guard, signals: Dict) -> Dict | None:
+        """
+        reads each distinct signal once and returns values to be sampled as int (None for x/z), or None if guard is
+        false
+        """
+        int_values = {id(h): to_int(h.value) for h in handles}
+        if guard is not None and not callable(guard) and not int_values[id(guard)]:
+            return None
+
+        values = {
+            k: [int_values[id(h)] for h in v] if isinstance(v, (list, tuple)) else int_values[id(v)]
+            for k, v in signals.items()
+        }
+        if callable(guard) and not guard(values):
+            return None
+        return values
+
+    async def _sample_on(self, clock, guard, read_only: bool, signals: Dict):
+        handles = [h for v in signals.values() for h in (v if isinstance(v, (list, tuple)) else [v])]
+        if guard is not None and not callable(guard):
+            handles.append(guard)
+        handles = list({id(h): h for h in handles}.values())
+
+        rising_edge = RisingEdge(clock)
+        read_only_phase = ReadOnly()
+        while True:
+            await rising_edge
+            if read_only:
+                await read_only_phase
+
+            values = self._read_signals(handles, guard, signals)
+            if values is None:
+                continue
+            while self._drive_simulator and self.queue_policy == "block" and self.queue_full():
+                self._sample_space.clear()
+                await self._sample_space.wait()
+
+            # signals can't be written in the ReadOnly phase. wake up the drain coroutine in the next time step
+            self._sample_with(values, notify=not read_only)
+            if read_only and self._drive_simulator:
+                await NextTimeStep()
+                self._sample_event.set()
+
+    async def sample_async(self):
+        """same as sample(), but waits for a free slot of the queue with block policy"""
+        while self._drive_simulator and self.queue_policy == "block" and self.queue_full():
+            self._sample_space.clear()
+            await self._sample_space.wait()
+        self.sample()
+
+    def queue_depth(self) -> int:
+        return len(self._sample_values)
+
+    def queue_full(self) -> bool:
+        return self.queue_size is not None and len(self._sample_values) >= self.queue_size
+
+    def _enqueue(self, values: Dict, notify: bool = True):
+        if self.queue_full():
+            if self.queue_policy == "block":
+                self.log.error(f"Sample queue of CoverGroup {self.name} is full ({self.queue_size})")
+                assert False, "use 'await sample_async()' to wait for a free slot with block policy"
+            elif self.queue_policy == "drop":
+                self._sample_values.popleft()
+            else:  # self.queue_policy == "coalesce"
+                self._sample_values.pop()
+            self.queue_dropped += 1
+
+        self._sample_values.append(values)
+        self.queue_high_water = max(self.queue_high_water, len(self._sample_values))
+        if notify:
+            self._sample_event.set()
+
+    def sample_many(self, **columns):
+        """
+        counts arrays of sampled values in python at once, without driving the simulator.
+        columns:        arrays of values keyed by coverpoint name. for a list of coverpoints, a sequence of arrays.
+                        a coverpoint referring to another coverpoint uses its column if not given.
+        """
+        cp_map = self._get_connected_coverpoints()
+
+        cp_columns = dict()
+        for k, v in columns.items():
+            if k not in cp_map:
+                self.log.error(f"CoverPoint {k} is not found in CoverGroup ({self.name}).")
+                assert False
+
+            cp = cp_map[k]
+            if isinstance(cp, list):
+                assert len(cp) == len(v), f"Length of values ({len(v)}) is not same to CoverPoint {k} ({len(cp)})"
+                for (_, cpi), vi in zip(cp, v):
+                    cp_columns[id(cpi)] = None if vi is None else as_value_array(vi)
+            else:
+                cp_columns[id(cp)] = None if v is None else as_value_array(v)
+
+        lengths = {len(c) for c in cp_columns.values() if c is not None}
+        if len(lengths) > 1:
+            raise ValueError(f"Error!! columns of CoverGroup {self.name} have different lengths ({sorted(lengths)})")
+
+        def get_column(cp):
+            if id(cp) in cp_columns:
+                return cp_columns[id(cp)]
+            return get_column(cp.ref) if cp.ref else None
+
+        coverpoints = [cpi for v in cp_map.values() for cpi in ([cp for _, cp in v] if isinstance(v, list) else [v])]
+        crosses = [x for _, x, _ in self._get_connected_crosses()]
+        crossed = {id(cp) for x in crosses for cp in x.coverpoints}
+        hits = dict()
+        for v in coverpoints:
+            column = get_column(v)
+            if column is not None:
+                hits[id(v)] = v.sample_many(column, return_hits=id(v) in crossed)
+
+        for x in crosses:
+            if all(id(cp) in hits for cp in x.coverpoints):
+                x.sample_many([hits[id(cp)] for cp in x.coverpoints])
+        columns = {id(v): get_column(v) for v in coverpoints}
+        rows = max((len(c) for c in columns.values() if c is not None), default=0)
+        if self._trace is not None and rows:
+            self._trace.record_many(self, columns, rows)
+        if rows:
+            self._notify_sample(rows)
+
+    def reset(self):
+        for _, v, _ in chain(self._traverse_coverpoint(), self._traverse_cross()):
+            v.reset()
+
+    def snapshot(self) -> Dict[str, np.ndarray | Dict[int, int]]:
+        return {v.name: v.snapshot() for _, v, _ in chain(self._traverse_coverpoint(), self._traverse_cross())}
+
+    def merge(self, other: CoverGroup | Dict[str, np.ndarray | Dict[int, int]]):
+        snapshot = other.snapshot() if isinstance(other, CoverGroup) else other
+        for _, v, _ in chain(self._traverse_coverpoint(), self._traverse_cross()):
+            v.merge(snapshot[v.name])
+
+    def coverage(self) -> float | None:
+        """average coverage of coverpoints and crosses counted in python"""
+        coverage_list = [v.coverage() for _, v, _ in chain(self._traverse_coverpoint(), self._traverse_cross())]
+        coverage_list = [i for i in coverage_list if i is not None]
+        return sum(coverage_list) / len(coverage_list) if coverage_list else None
 
     @property
     def sample_name(self):
         if hasattr(self, "name"):
             return str(self.name) + "_sample"
 
+    @property
+    def packed_name(self):
+        if hasattr(self, "name"):
+            return str(self.name) + "_packed"
+
+    @property
+    def fifo_name(self):
+        if hasattr(self, "name"):
+            return str(self.name) + "_fifo"
+
+    @property
+    def fifo_count_name(self):
+        if hasattr(self, "name"):
+            return str(self.name) + "_fifo_count"
+
     @property
     def instance_name(self):
         if hasattr(self, "name"):
@@ -631,16 +1489,44 @@ class CoverGroup:
 
     # methods for generating systemverilog
     def sv_wire(self):
-        coverpoint_wire = [v.sv_wire() for _, v, _ in self._traverse_coverpoint() if v.ref is None]
+        sample_wire = [f"wire {self.sample_name};"] if self._shared_sample is None else []
+        if self.drive_mode == "packed":
+            layout = self._packed_layout()
+            packed_width = sum(width for _, _, width in layout)
+            packed_wire = [f"wire [{packed_width - 1}:0] {self.packed_name};"] if layout else []
+            for v, offset, width in layout:
+                packed_slice = f"[{offset + width - 1}:{offset}]" if width > 1 else f"[{offset}]"
+                packed_wire.append(v.sv_wire())
+                packed_wire.append(f"assign {v.signal} = {self.packed_name}{packed_slice};")
+            return "\n".join(packed_wire + sample_wire)
+
+        if self.drive_mode == "fifo":
+            layout = self._packed_layout()
+            packed_width = sum(width for _, _, width in layout)
+            fifo_wire = [
+                f"wire [{self.fifo_depth * packed_width - 1}:0] {self.fifo_name};",
+                f"wire [{self.fifo_depth.bit_length() - 1}:0] {self.fifo_count_name};",
+            ]
+            fifo_wire += [v.sv_wire().replace("wire", "logic", 1) for v, _, _ in layout]
+            return "\n".join(fifo_wire + sample_wire)
+
+        python_only = self._python_only_coverpoints()
+        coverpoint_wire = [
+            v.sv_wire() for _, v, _ in self._traverse_coverpoint() if v.ref is None and id(v) not in python_only
+        ]
         coverpoint_wire = [i for i in coverpoint_wire if i is not None]
-        sample_wire = [f"wire {self.sample_name};"]
         return "\n".join(coverpoint_wire + sample_wire)
 
     def sv_declare(self) -> str:
         covergroup_start = [f"covergroup {self.name};"]
-        coverpoint_declare = [v.sv_declare() for _, v, _, in self._traverse_coverpoint()]
+        python_only = self._python_only_coverpoints()
+        coverpoint_declare = [v.sv_declare() for _, v, _, in self._traverse_coverpoint() if id(v) not in python_only]
         coverpoint_declare = [i for i in coverpoint_declare if i is not None]
-        cross_declare = [x.sv_declare() for _, x, _ in self._traverse_cross()]
+        cross_declare = [
+            x.sv_declare()
+            for _, x, _ in self._traverse_cross()
+            if not any(id(cp) in python_only for cp in x.coverpoints)
+        ]
         covergroup_end = [f"endgroup : {self.name}"]
         return "\n".join(covergroup_start + coverpoint_declare + cross_declare + covergroup_end)
 
@@ -648,7 +1534,21 @@ class CoverGroup:
         return f"{self.name} {self.instance_name} = new;"
 
     def sv_sample_event(self):
-        return f"always@ ({self.sample_name}) begin {self.instance_name}.sample(); end"
+        sample_signal = self._shared_sample or self.sample_name
+        if self.drive_mode == "fifo":
+            layout = self._packed_layout()
+            packed_width = sum(width for _, _, width in layout)
+            sample_loop = [
+                f"always@ ({sample_signal}) begin",
+                f"for (int i = 0; i < {self.fifo_count_name}; i++) begin",
+            ]
+            sample_loop += [
+                f"{v.signal} = {self.fifo_name}[i * {packed_width} + {offset} +: {width}];"
+                for v, offset, width in layout
+            ]
+            sample_loop += [f"{self.instance_name}.sample();", "end", "end"]
+            return "\n".join(sample_loop)
+        return f"always@ ({sample_signal}) begin {self.instance_name}.sample(); end"
 
     def systemverilog(self):
         sv_wire = self.sv_wire()
@@ -694,16 +1594,22 @@ class CoverageModel:
         obj._copy_covergroups()
         return obj
 
-    def __init__(self, name: str | None = None, log_level: str = "INFO"):
+    def __init__(self, name: str | None = None, log_level: str = "INFO", shared_sample: bool = False):
         """
         name:           name of coverage model
         log_level:      log level in cocotb simulation log
+        shared_sample:  if True, covergroups share one sample vector (a bit per covergroup) and their queued samples
+                        are driven by a single coroutine of the model, toggling the vector once per delta cycle
         """
+        self.shared_sample = shared_sample
         self.set_name(name)
 
         self.log = SimLog(f"cocotbext.fcov.{self.__class__.__name__}")
         self.log.setLevel(log_level)
 
+        self._sample_handler = None
+        self._sample_thread = None
+
     def _copy_covergroups(self):
         cg_map = dict()
         for k, v in self._traverse_covergroup(flatten=False):
@@ -753,19 +1659,106 @@ class CoverageModel:
                 name = v.name
             v.set_name(name, seperator=seperator)
 
-    def connect(self, dut):
-        if hasattr(dut, self.name):
+        for i, cg in enumerate(self._shared_covergroups()):
+            cg.share_sample(f"{self.sample_name}[{i}]")
+
+    def _shared_covergroups(self) -> List[CoverGroup]:
+        """covergroups driven by the shared sample vector"""
+        if not self.shared_sample:
+            return []
+        return [v for _, v, _ in self._traverse_covergroup() if v.backend != "python"]
+
+    @property
+    def sample_name(self):
+        if hasattr(self, "name"):
+            return str(self.name) + "_sample"
+
+    def connect(self, dut=None):
+        if dut is not None and hasattr(dut, self.name):
             self.log.info("Coverage enabled for %s", self.name)
             cov_inst = getattr(dut, self.name)
             for _, v, _ in self._traverse_covergroup():
                 v.connect(cov_inst)
+            self._connect_shared_sample(cov_inst)
         else:
-            self.log.warning("Coverage instance %s does not exist in dut!", self.name)
+            if dut is None:
+                self.log.info("Coverage enabled for %s without simulator", self.name)
+            else:
+                self.log.warning(
+                    "Coverage instance %s does not exist in dut! only covergroups counted in python are collected",
+                    self.name,
+                )
+            for _, v, _ in self._traverse_covergroup():
+                v.connect(None, standalone=dut is None)
+
+    def reset(self):
+        for _, v, _ in self._traverse_covergroup():
+            v.reset()
+
+    def snapshot(self) -> Dict[str, Dict[str, np.ndarray | Dict[int, int]]]:
+        return {v.name: v.snapshot() for _, v, _ in self._traverse_covergroup()}
+
+    def merge(self, other: CoverageModel | Dict[str, Dict[str, np.ndarray | Dict[int, int]]]):
+        snapshot = other.snapshot() if isinstance(other, CoverageModel) else other
+        for _, v, _ in self._traverse_covergroup():
+            v.merge(snapshot[v.name])
+
+    def coverage(self) -> float | None:
+        """average coverage of covergroups counted in python"""
+        coverage_list = [v.coverage() for _, v, _ in self._traverse_covergroup()]
+        coverage_list = [i for i in coverage_list if i is not None]
+        return sum(coverage_list) / len(coverage_list) if coverage_list else None
+
+    def _connect_shared_sample(self, coverage_instance):
+        covergroups = self._shared_covergroups()
+        if not covergroups:
+            return
+
+        if not hasattr(coverage_instance, self.sample_name):
+            self.log.error(f"No sample signal {self.sample_name} in CoverageModel {self.name}")
+            assert False
+
+        # covergroups notify the model, instead of their own coroutines
+        self._sample_event = Event()
+        for cg in covergroups:
+            cg.set_sample_event(self._sample_event)
+        if any(cg._sample_values for cg in covergroups):
+            self._sample_event.set()
+
+        if self._sample_thread:
+            self._sample_thread.kill()
+        self._sample_handler = getattr(coverage_instance, self.sample_name)
+        self._sample_thread = cocotb.start_soon(self._sample(covergroups))
+
+    def _toggle_shared_sample(self, covergroups: List[CoverGroup]) -> int:
+        """drives next samples of covergroups having queued samples, and returns bits of them to be toggled"""
+        toggle = 0
+        for i, cg in enumerate(covergroups):
+            if cg._sample_values:
+                cg._drive_next()
+                toggle |= 1 << i
+        return toggle
+
+    async def _sample(self, covergroups: List[CoverGroup]):
+        handler_value = to_int(self._sample_handler.value) or 0
+
+        while True:
+            await self._sample_event.wait()
+            self._sample_event.clear()
+            while True:
+                toggle = self._toggle_shared_sample(covergroups)
+                if not toggle:
+                    break
+                self._sample_handler.value = handler_value = handler_value ^ toggle
+                await Edge(self._sample_handler)
 
     def systemverilog(self, name=None):
         if name is None:
             name = self.name
         header = f"module {name} ();\n"
+        covergroups = self._shared_covergroups()
+        if covergroups:
+            header += f"wire [{len(covergroups) - 1}:0] {self.sample_name};\n\n"
         body = "\n".join([v.systemverilog() for _, v, _ in self._traverse_covergroup()])
         footer = "endmodule\n"
         return header + body + footer
@@ -787,11 +1780,31 @@ class CoverageModel:
 
 
 class CoverageCollector:
-    def __init__(self, dut, cov_model, log_level: str = "INFO", **kwargs) -> None:
+    def __init__(
+        self,
+        dut,
+        cov_model,
+        log_level: str = "INFO",
+        shared: str | None = None,
+        flush_samples: int | None = None,
+        checkpoint: str | None = None,
+        checkpoint_samples: int | None = None,
+        checkpoint_time: int | None = None,
+        trace: str | None = None,
+        **kwargs,
+    ) -> None:
         """
-        dut:            cocotb entity for dut
-        cov_model:      instances of coverage model
-        log_level:      log level in cocotb simulation log
+        dut:                cocotb entity for dut. if None, coverage is counted in python without simulator
+        cov_model:          instances of coverage model
+        log_level:          log level in cocotb simulation log
+        shared:             path of coverage database shared by simulations on the same host. counters counted
+                            in python are added to it by flush(), and by close() or at exit
+        flush_samples:      calls flush() every flush_samples samples of all covergroups
+        checkpoint:         path of coverage database where counters counted in python are saved by checkpoint().
+                            only changed counters are written
+        checkpoint_samples: calls checkpoint() every checkpoint_samples samples of all covergroups
+        checkpoint_time:    calls checkpoint() every checkpoint_time ns of simulation time
+        trace:              path of trace file where sampled values are recorded, to be replayed offline
         """
         self.dut = dut
 
@@ -800,6 +1813,48 @@ class CoverageCollector:
 
         self.connect_coverage(dut, cov_model)
 
+        self.shared = None
+        if shared is not None:
+            from .db import SharedCounters
+
+            self.shared = SharedCounters(shared, self.cov_models)
+            self.log.info(f"Coverage shared in {shared}")
+            # counts since the last flush are added by close(), or when the collector is collected or python exits
+            self._flush_shared = weakref.finalize(self, self.shared.flush)
+
+            self.flush_samples = flush_samples
+            self._unflushed_samples = 0
+            if flush_samples:
+                for m in self.cov_models:
+                    for _, cg, _ in m._traverse_covergroup():
+                        cg.add_sample_hook(self._count_flush_samples)
+
+        self.checkpoint_db = None
+        if checkpoint is not None:
+            from .db import Checkpoint
+
+            self.checkpoint_db = Checkpoint(checkpoint, self.cov_models)
+            self.log.info(f"Coverage checkpointed in {checkpoint}")
+
+            self.checkpoint_samples = checkpoint_samples
+            self._unsaved_samples = 0
+            if checkpoint_samples:
+                for m in self.cov_models:
+                    for _, cg, _ in m._traverse_covergroup():
+                        cg.add_sample_hook(self._count_samples)
+            if checkpoint_time:
+                assert dut is not None, "Error!! checkpoint_time needs a simulator"
+                self._checkpoint_thread = cocotb.start_soon(self._checkpoint_on_time(checkpoint_time))
+
+        self.trace = None
+        if trace is not None:
+            from .trace import TraceWriter
+
+            self.trace = TraceWriter(trace, self.cov_models)
+            self.log.info(f"Sampled values recorded in {trace}")
+            # samples kept in memory are written by close(), or when the collector is collected or python exits
+            self._close_trace = weakref.finalize(self, self.trace.close)
+
     def connect_coverage(self, dut, cov_model):
         if isinstance(cov_model, CoverageModel):
             cov_model = [cov_model]
@@ -812,3 +1867,42 @@ class CoverageCollector:
             m.connect(dut)
             setattr(self, m.name, m)
         self.cov = cov_model[0]
+        self.cov_models = cov_model
+
+    def coverage(self) -> Dict[str, float | None]:
+        """coverage of each coverage model counted in python"""
+        return {m.name: m.coverage() for m in self.cov_models}
+
+    def flush(self) -> int:
+        """adds counters counted since the last flush to the shared coverage database"""
+        assert self.shared is not None, "Error!! coverage is not shared"
+        self._unflushed_samples = 0
+        return self.shared.flush()
+
+    def checkpoint(self) -> int:
+        """writes counters changed since the last checkpoint to the checkpoint database"""
+        assert self.checkpoint_db is not None, "Error!! checkpoint is not enabled"
+        self._unsaved_samples = 0
+        return self.checkpoint_db.save()
+
+    def close(self):
+        """adds counters counted since the last flush to the shared coverage database, and closes the trace file"""
+        if self.shared is not None:
+            self._flush_shared()
+        if self.trace is not None:
+            self._close_trace()
+
+    def _count_flush_samples(self, num: int):
+        self._unflushed_samples += num
+        if self._unflushed_samples >= self.flush_samples:
+            self.flush()
+
+    def _count_samples(self, num: int):
+        self._unsaved_samples += num
+        if self._unsaved_samples >= self.checkpoint_samples:
+            self.checkpoint()
+
+    async def _checkpoint_on_time(self, period: int):
+        while True:
+            await Timer(period, "ns")
+            self.checkpoint()
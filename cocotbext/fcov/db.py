@@ -0,0 +1,893 @@
+from __future__ import annotations
+
+import os
+import json
+import zlib
+import fcntl
+import heapq
+import struct
+import hashlib
+import numpy as np
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+from typing import Dict, Iterable, List, Tuple
+
+from .coverage import CoverPoint, Cross, CoverGroup, CoverageModel
+
+MAGIC = b"FCOVDB\x00\x01"
+PREFIX = struct.Struct("<8sQQ32s")
+ALIGN = 64
+
+# file layout
+# - prefix: magic, header size and dense size (uint64, little endian), and fingerprint (sha256 digest)
+# - header (json, padded to ALIGN bytes)
+# - dense counters of coverpoints and dense crosses (int64, little endian), each at a fixed offset in header
+# - sparse crosses (int64, little endian), each as sorted keys followed by their counts
+#
+# databases of the same fingerprint share the layout of dense counters, so they can be summed without the header
+
+
+def compact_names(names: Iterable[str]) -> List:
+    """compacts array bin names, name[0], name[1], ..., name[n-1] to [name, n]"""
+    compact = []
+    for name in names:
+        base, sep, index = name[:-1].rpartition("[")
+        if name.endswith("]") and sep and index.isdigit():
+            last = compact[-1] if compact else None
+            if index == "0":
+                compact.append([base, 1])
+                continue
+            if isinstance(last, list) and last[0] == base and last[1] == int(index):
+                last[1] += 1
+                continue
+        compact.append(name)
+    return compact
+
+
+def expand_names(compact: Iterable) -> List[str]:
+    """inverse of compact_names()"""
+    names = []
+    for name in compact:
+        if isinstance(name, list):
+            names += [f"{name[0]}[{i}]" for i in range(name[1])]
+        else:
+            names.append(name)
+    return names
+
+
+def _as_models(models) -> List[CoverageModel | CoverGroup]:
+    if isinstance(models, (CoverageModel, CoverGroup)):
+        return [models]
+    if isinstance(models, dict):
+        for k, v in models.items():
+            v.set_name(k)
+        return list(models.values())
+    return list(models)
+
+
+def _covergroups(model: CoverageModel | CoverGroup) -> Iterable[Tuple[str, CoverGroup]]:
+    if isinstance(model, CoverGroup):
+        yield "", model
+    else:
+        for _, cg, _ in model._traverse_covergroup():
+            yield model.name, cg
+
+
+def _counters(models) -> Iterable[CoverPoint | Cross]:
+    """coverpoints and crosses in the order of structure()"""
+    for model in models:
+        for _, cg in _covergroups(model):
+            yield from (cp for _, cp, _ in cg._traverse_coverpoint())
+            yield from (x for _, x, _ in cg._traverse_cross())
+
+
+def structure(models) -> List[Dict]:
+    """entries of coverpoints and crosses without counters, which describe the layout of a database"""
+    entries = []
+    for model in _as_models(models):
+        for model_name, cg in _covergroups(model):
+            for _, cp, _ in cg._traverse_coverpoint():
+                entries.append(
+                    {
+                        "model": model_name,
+                        "group": cg.name,
+                        "name": cp.name,
+                        "kind": "coverpoint",
+                        "bins": compact_names(cp.bin_names),
+                        "ignore_bins": compact_names(cp.ignore_bins.bin_names()),
+                        "illegal_bins": compact_names(cp.illegal_bins.bin_names()),
+                    }
+                )
+                # ordinals of default bins, which are not covered
+                if cp.default_mask.any():
+                    entries[-1]["default"] = np.flatnonzero(cp.default_mask).tolist()
+            for _, x, _ in cg._traverse_cross():
+                entries.append(
+                    {
+                        "model": model_name,
+                        "group": cg.name,
+                        "name": x.name,
+                        "kind": "cross",
+                        "coverpoints": [cp.name for cp in x.coverpoints],
+                        "dims": [cp.num for cp in x.coverpoints],
+                        "format": "dense" if x.is_dense else "sparse",
+                    }
+                )
+    return entries
+
+
+def fingerprint(entries: List[Dict]) -> str:
+    """hash of the structure of coverage models. databases can be merged only if fingerprints are same"""
+    keys = ["model", "group", "name", "kind", "bins", "ignore_bins", "illegal_bins", "coverpoints", "dims", "format"]
+    layout = [{k: e[k] for k in keys if k in e} for e in entries]
+    return hashlib.sha256(json.dumps(layout, separators=(",", ":")).encode()).hexdigest()
+
+
+def _counter_block(counter) -> np.ndarray:
+    if isinstance(counter, dict):
+        # sparse cross: sorted keys followed by their counts
+        assert all(k < 1 << 63 for k in counter), "Error!! keys of sparse cross don't fit in int64"
+        keys = np.fromiter(counter.keys(), dtype=np.int64, count=len(counter))
+        counts = np.fromiter(counter.values(), dtype=np.int64, count=len(counter))
+        order = np.argsort(keys)
+        return np.concatenate([keys[order], counts[order]])
+    return np.asarray(counter, dtype=np.int64)
+
+
+def _is_sparse(entry: Dict) -> bool:
+    return entry.get("format") == "sparse"
+
+
+def _header(entries: List[Dict], meta: Dict | None = None) -> bytes:
+    header = {
+        "version": 1,
+        "fingerprint": fingerprint(entries),
+        "meta": dict() if meta is None else meta,
+        "entries": entries,
+    }
+    return json.dumps(header, separators=(",", ":")).encode()
+
+
+def write_blocks(
+    path: str, entries: List[Dict], blocks: List[np.ndarray], meta: Dict | None = None, reserve: int = 0
+) -> int:
+    """
+    writes counter blocks of entries (see structure()) to a database file. returns size of the padded header
+    reserve:        bytes reserved in the header, so that it can be rewritten in place when sparse crosses grow
+    """
+    order = sorted(range(len(entries)), key=lambda i: _is_sparse(entries[i]))
+    offset = 0
+    dense_size = 0
+    for i in order:
+        entries[i]["offset"] = offset
+        entries[i]["length"] = len(blocks[i])
+        offset += len(blocks[i]) * 8
+        dense_size += 0 if _is_sparse(entries[i]) else len(blocks[i])
+
+    header = _header(entries, meta) + b" " * reserve
+    header += b" " * (-(PREFIX.size + len(header)) % ALIGN)
+
+    with open(path, "wb") as f:
+        f.write(PREFIX.pack(MAGIC, len(header), dense_size, bytes.fromhex(fingerprint(entries))))
+        f.write(header)
+        for i in order:
+            f.write(blocks[i].astype("<i8", copy=False).tobytes())
+    return len(header)
+
+
+def read_prefix(f) -> Tuple[int, int, str]:
+    """reads (header size, dense size, fingerprint) from an opened database file"""
+    prefix = f.read(PREFIX.size)
+    assert len(prefix) == PREFIX.size and prefix[: len(MAGIC)] == MAGIC, f"Error!! {f.name} is not a coverage database"
+    _, header_size, dense_size, digest = PREFIX.unpack(prefix)
+    return header_size, dense_size, digest.hex()
+
+
+def write(path: str, models, meta: Dict | None = None):
+    """
+    writes counters of coverage models (or covergroups) counted in python to a database file.
+    path:           path of database file
+    models:         coverage model, covergroup, or list (or dict keyed by name) of them
+    meta:           json serializable information of the run, e.g. test name and seed
+    """
+    models = _as_models(models)
+    write_blocks(path, structure(models), [_counter_block(v.snapshot()) for v in _counters(models)], meta)
+
+
+class CoverageDB:
+    def __init__(self, path: str):
+        """
+        path:           path of database file. counters are memory-mapped and read only when accessed
+        """
+        self.path = path
+        with open(path, "rb") as f:
+            header_size, self.dense_size, _ = read_prefix(f)
+            header = json.loads(f.read(header_size))
+
+        self.version = header["version"]
+        self.fingerprint = header["fingerprint"]
+        self.meta = header["meta"]
+        self.entries = header["entries"]
+        self.data_offset = PREFIX.size + header_size
+        # blocks are contiguous, except sparse crosses of checkpoints which can leave a gap before them
+        self.size = max((e["offset"] // 8 + e["length"] for e in self.entries), default=0)
+        self._index = {(e["model"], e["group"], e["name"]): e for e in self.entries}
+        self._data = None
+
+    def __repr__(self):
+        return f"{self.__class__.__name__}(path={self.path}, entries={len(self.entries)}, meta={self.meta})"
+
+    def __len__(self):
+        return len(self.entries)
+
+    def __contains__(self, key: Tuple[str, str, str]):
+        return tuple(key) in self._index
+
+    def keys(self) -> List[Tuple[str, str, str]]:
+        """(model, group, name) of coverpoints and crosses"""
+        return list(self._index)
+
+    def entry(self, model: str, group: str, name: str) -> Dict:
+        key = (model, group, name)
+        assert key in self._index, f"Error!! {key} is not found in {self.path}"
+        return self._index[key]
+
+    @property
+    def data(self) -> np.ndarray:
+        """all counters as one memory-mapped int64 vector"""
+        if self._data is None and self.size == 0:
+            self._data = np.zeros(0, dtype="<i8")
+        elif self._data is None:
+            self._data = np.memmap(self.path, dtype="<i8", mode="r", offset=self.data_offset, shape=(self.size,))
+        return self._data
+
+    def block(self, model: str, group: str, name: str) -> np.ndarray:
+        entry = self.entry(model, group, name)
+        start = entry["offset"] // 8
+        return self.data[start : start + entry["length"]]
+
+    def counts(self, model: str, group: str, name: str) -> np.ndarray | Dict[int, int]:
+        """
+        counters of a coverpoint (bins, ignore_bins, illegal_bins), dense cross (flattened cross bins),
+        or sparse cross (dict of flattened index and count)
+        """
+        entry = self.entry(model, group, name)
+        block = self.block(model, group, name)
+        if entry["kind"] == "cross" and entry["format"] == "sparse":
+            half = len(block) // 2
+            return dict(zip(block[:half].tolist(), block[half:].tolist()))
+        return block
+
+    def bin_names(self, model: str, group: str, name: str) -> List[str]:
+        entry = self.entry(model, group, name)
+        if entry["kind"] == "cross":
+            return None
+        return expand_names(entry["bins"])
+
+    def hits(self, model: str, group: str, name: str) -> Dict:
+        """counts of bins keyed by bin name, or of hit cross bins keyed by tuple of bin names"""
+        entry = self.entry(model, group, name)
+        counts = self.counts(model, group, name)
+        if entry["kind"] == "coverpoint":
+            names = expand_names(entry["bins"])
+            return dict(zip(names, counts[: len(names)].tolist()))
+
+        if entry["format"] == "dense":
+            counts = {k: int(counts[k]) for k in np.flatnonzero(counts).tolist()}
+        names = [self.bin_names(model, group, cp) for cp in entry["coverpoints"]]
+        hits = dict()
+        for key, count in sorted(counts.items()):
+            ordinals = []
+            for dim in reversed(entry["dims"]):
+                key, ordinal = divmod(key, dim)
+                ordinals.append(ordinal)
+            hits[tuple(n[i] for n, i in zip(names, ordinals[::-1]))] = count
+        return hits
+
+    def snapshot(self, model: str = "") -> Dict[str, Dict]:
+        """counters of a model, same as CoverageModel.snapshot(). CoverageModel.merge() can take it"""
+        snapshot = dict()
+        for entry in self.entries:
+            if entry["model"] == model:
+                counts = self.counts(model, entry["group"], entry["name"])
+                snapshot.setdefault(entry["group"], dict())[entry["name"]] = (
+                    counts if isinstance(counts, dict) else np.array(counts)
+                )
+        return snapshot
+
+
+def _read_counters(path: str, digest: str | None = None, sparse: List[int] = ()) -> Tuple[str, np.ndarray, Dict]:
+    """reads dense counters and sparse crosses (indexed by entries) of a database file"""
+    with open(path, "rb") as f:
+        header_size, dense_size, file_digest = read_prefix(f)
+        assert digest is None or file_digest == digest, (
+            f"Error!! {path} can't be merged, its coverage models are different ({file_digest} != {digest})"
+        )
+        f.seek(header_size, os.SEEK_CUR)
+        dense = np.fromfile(f, dtype="<i8", count=dense_size)
+    assert len(dense) == dense_size, f"Error!! {path} is truncated"
+    sparse_counts = dict()
+    if sparse:
+        cov_db = CoverageDB(path)
+        for i in sparse:
+            e = cov_db.entries[i]
+            sparse_counts[i] = cov_db.counts(e["model"], e["group"], e["name"])
+    return file_digest, dense, sparse_counts
+
+
+def _test_name(path: str) -> str:
+    with open(path, "rb") as f:
+        header_size, _, _ = read_prefix(f)
+        return str(json.loads(f.read(header_size))["meta"].get("test", path))
+
+
+def _merge_counters(a: Tuple, b: Tuple) -> Tuple:
+    """merges partial results (fingerprint, dense counters, sparse crosses, tests hitting bins)"""
+    digest, dense, sparse, tests = a
+    assert digest == b[0], f"Error!! coverage models are different ({digest} != {b[0]})"
+    dense += b[1]
+    for i, counts in b[2].items():
+        merged = sparse.setdefault(i, dict())
+        for k, c in counts.items():
+            merged[k] = merged.get(k, 0) + c
+    if tests is not None:
+        # bitmaps of tests are concatenated, so every partial result but the last has a multiple of 8 tests
+        names, bits, sparse_tests = tests
+        assert len(names) % 8 == 0
+        for i, keys in b[3][2].items():
+            merged = sparse_tests.setdefault(i, dict())
+            for k, t in keys.items():
+                merged.setdefault(k, []).extend(j + len(names) for j in t)
+        tests = names + b[3][0], np.concatenate([bits, b[3][1]]), sparse_tests
+    return digest, dense, sparse, tests
+
+
+def _merge_chunk(paths: List[str], digest: str, sparse: List[int], index: bool = False) -> Tuple:
+    merged = None
+    hits = []
+    sparse_tests = dict()
+    for j, path in enumerate(paths):
+        counters = _read_counters(path, digest, sparse)
+        if index:
+            hits.append(counters[1] > 0)
+            for i, counts in counters[2].items():
+                keys = sparse_tests.setdefault(i, dict())
+                for k in (k for k, c in counts.items() if c):
+                    keys.setdefault(k, []).append(j)
+        merged = (*counters, None) if merged is None else _merge_counters(merged, (*counters, None))
+
+    if index:
+        # bit j % 8 of byte j // 8 is set if test j hits the bin
+        bits = np.packbits(np.stack(hits), axis=0, bitorder="little")
+        merged = *merged[:3], ([_test_name(p) for p in paths], bits, sparse_tests)
+    return merged
+
+
+def merge(
+    paths: Iterable[str], output: str, jobs: int | None = None, meta: Dict | None = None, index: str | None = None
+) -> int:
+    """
+    sums counters of database files of the same coverage models and writes them to a database file.
+    files are merged in chunks by worker processes, and then partial sums are reduced pairwise as a tree.
+    paths:          paths of database files to merge
+    output:         path of merged database file
+    jobs:           number of worker processes. os.cpu_count() if None, and no worker process if 1
+    meta:           json serializable information of the merged database. number of merged files by default
+    index:          path of index file of tests hitting each bin (see HitIndex). tests are named by "test" in meta
+                    of database files, or their paths
+    returns number of merged files
+    """
+    paths = [str(p) for p in paths]
+    assert paths, "Error!! no coverage database to merge"
+    first = CoverageDB(paths[0])
+    entries = [{k: v for k, v in e.items() if k not in ("offset", "length")} for e in first.entries]
+    sparse = [i for i, e in enumerate(first.entries) if _is_sparse(e)]
+
+    jobs = min(jobs or os.cpu_count() or 1, len(paths))
+    with_index = index is not None
+    if jobs == 1:
+        merged = _merge_chunk(paths, first.fingerprint, sparse, with_index)
+    else:
+        chunk_size = -(-len(paths) // (jobs * 4))
+        chunk_size += -chunk_size % 8
+        chunks = [paths[i : i + chunk_size] for i in range(0, len(paths), chunk_size)]
+        n = len(chunks)
+        with ProcessPoolExecutor(jobs) as executor:
+            partials = list(executor.map(_merge_chunk, chunks, [first.fingerprint] * n, [sparse] * n, [with_index] * n))
+            while len(partials) > 1:
+                reduced = list(executor.map(_merge_counters, partials[0::2], partials[1::2]))
+                partials = reduced + partials[len(reduced) * 2 :]
+        merged = partials[0]
+
+    _, dense, sparse_counts, tests = merged
+    blocks = []
+    for i, e in enumerate(first.entries):
+        if _is_sparse(e):
+            blocks.append(_counter_block(sparse_counts.get(i, dict())))
+        else:
+            start = e["offset"] // 8
+            blocks.append(dense[start : start + e["length"]])
+    write_blocks(output, entries, blocks, {"merged": len(paths)} if meta is None else meta)
+    if index is not None:
+        write_index(index, entries, *tests)
+    return len(paths)
+
+
+# index file layout
+# - prefix: magic, header size and number of dense bins (uint64, little endian), and fingerprint (sha256 digest)
+# - header (json): names of tests, and entries of the merged database with tests hitting bins of sparse crosses
+# - offsets of compressed bitmaps of dense bins (int64, little endian), one more than the number of dense bins
+# - zlib compressed bitmaps of tests hitting each dense bin
+
+INDEX_MAGIC = b"FCOVIDX\x01"
+
+
+def write_index(path: str, entries: List[Dict], names: List[str], bits: np.ndarray, sparse_tests: Dict):
+    """writes bitmaps of tests (bits[test // 8, bin]) hitting bins of entries of a merged database"""
+    entries = [dict(e) for e in entries]
+    for i, e in enumerate(entries):
+        if _is_sparse(e):
+            e["tests"] = {str(k): t for k, t in sorted(sparse_tests.get(i, dict()).items())}
+    digest = fingerprint(entries)
+    header = json.dumps({"version": 1, "fingerprint": digest, "tests": names, "entries": entries})
+    header = header.encode()
+    header += b" " * (-(PREFIX.size + len(header)) % ALIGN)
+
+    rows = [zlib.compress(row.tobytes()) for row in np.ascontiguousarray(bits.T)]
+    offsets = np.zeros(len(rows) + 1, dtype="<i8")
+    np.cumsum([len(r) for r in rows], out=offsets[1:])
+    with open(path, "wb") as f:
+        f.write(PREFIX.pack(INDEX_MAGIC, len(header), len(rows), bytes.fromhex(digest)))
+        f.write(header)
+        f.write(offsets.tobytes())
+        f.write(b"".join(rows))
+
+
+class HitIndex:
+    def __init__(self, path: str):
+        """
+        path:           path of index file written by merge(), which keeps a compressed bitmap of tests per bin
+        """
+        self.path = path
+        with open(path, "rb") as f:
+            prefix = f.read(PREFIX.size)
+            assert prefix[: len(INDEX_MAGIC)] == INDEX_MAGIC, f"Error!! {path} is not an index of tests"
+            _, header_size, num_rows, _ = PREFIX.unpack(prefix)
+            header = json.loads(f.read(header_size))
+            self.offsets = np.fromfile(f, dtype="<i8", count=num_rows + 1)
+        self.data_offset = PREFIX.size + header_size + (num_rows + 1) * 8
+        self.fingerprint = header["fingerprint"]
+        self.tests = header["tests"]
+        self.entries = header["entries"]
+        self._index = {(e["model"], e["group"], e["name"]): e for e in self.entries}
+        self._bin_index = dict()
+
+    def __repr__(self):
+        return f"{self.__class__.__name__}(path={self.path}, tests={len(self.tests)}, entries={len(self.entries)})"
+
+    def entry(self, model: str, group: str, name: str) -> Dict:
+        key = (model, group, name)
+        assert key in self._index, f"Error!! {key} is not found in {self.path}"
+        return self._index[key]
+
+    def _ordinal(self, model: str, group: str, name: str, bin: str) -> int:
+        key = (model, group, name)
+        if key not in self._bin_index:
+            self._bin_index[key] = {n: i for i, n in enumerate(expand_names(self.entry(*key)["bins"]))}
+        assert bin in self._bin_index[key], f"Error!! {bin} is not a bin of {name}"
+        return self._bin_index[key][bin]
+
+    def _row(self, row: int) -> np.ndarray:
+        with open(self.path, "rb") as f:
+            f.seek(self.data_offset + int(self.offsets[row]))
+            data = zlib.decompress(f.read(int(self.offsets[row + 1] - self.offsets[row])))
+        bits = np.unpackbits(np.frombuffer(data, dtype=np.uint8), count=len(self.tests), bitorder="little")
+        return np.flatnonzero(bits)
+
+    def tests_hitting(self, model: str, group: str, name: str, bin: str | Tuple[str, ...]) -> List[str]:
+        """
+        names of tests hitting a bin of a coverpoint, or a cross bin given as a tuple of bin names of coverpoints
+        """
+        entry = self.entry(model, group, name)
+        if entry["kind"] == "coverpoint":
+            return [self.tests[i] for i in self._row(entry["offset"] // 8 + self._ordinal(model, group, name, bin))]
+
+        assert len(bin) == len(entry["coverpoints"]), f"Error!! {bin} is not a bin of {name}"
+        key = 0
+        for cp, b, dim in zip(entry["coverpoints"], bin, entry["dims"]):
+            key = key * dim + self._ordinal(model, group, cp, b)
+        if _is_sparse(entry):
+            return [self.tests[i] for i in entry["tests"].get(str(key), [])]
+        return [self.tests[i] for i in self._row(entry["offset"] // 8 + key)]
+
+
+POPCOUNT = np.array([bin(i).count("1") for i in range(256)], dtype=np.uint8)
+
+
+def popcount(bits: np.ndarray) -> np.ndarray:
+    """number of set bits of packed bitsets (uint8) along the last axis"""
+    count = np.bitwise_count(bits) if hasattr(np, "bitwise_count") else POPCOUNT[bits]
+    return count.sum(axis=-1, dtype=np.int64)
+
+
+def _bin_masks(entries: List[Dict]) -> List[np.ndarray]:
+    """
+    masks of bins of coverpoints, or of coverpoints of crosses, which are covered as CoverPoint.coverage() and
+    Cross.coverage(), i.e. not default bins
+    """
+    masks = dict()
+    bin_masks = []
+    for e in entries:
+        key = (e["model"], e["group"])
+        if e["kind"] == "coverpoint":
+            mask = np.ones(len(expand_names(e["bins"])), dtype=bool)
+            mask[e.get("default", [])] = False
+            masks[(*key, e["name"])] = mask
+        else:
+            mask = [masks.get((*key, cp), np.ones(dim, dtype=bool)) for cp, dim in zip(e["coverpoints"], e["dims"])]
+            if not _is_sparse(e):
+                # cross bins in the order of counters, i.e. the last coverpoint varies fastest
+                dense = np.ones(1, dtype=bool)
+                for m in mask:
+                    dense = (dense[:, None] & m[None, :]).ravel()
+                mask = dense
+        bin_masks.append(mask)
+    return bin_masks
+
+
+def _coverable(entries: List[Dict], dense_size: int) -> np.ndarray:
+    """
+    mask of dense counters which are bins of coverpoints or crosses, i.e. not ignore_bins, illegal_bins nor default
+    bins, so that coverage is same as coverage() of models
+    """
+    mask = np.zeros(dense_size, dtype=bool)
+    for e, bin_mask in zip(entries, _bin_masks(entries)):
+        if not _is_sparse(e):
+            mask[e["offset"] // 8 : e["offset"] // 8 + len(bin_mask)] = bin_mask
+    return mask
+
+
+def _union_chunk(paths: List[str], digest: str, sparse: List[int]) -> Tuple[np.ndarray, Dict]:
+    union = None
+    keys = {i: set() for i in sparse}
+    for path in paths:
+        _, dense, sparse_counts = _read_counters(path, digest, sparse)
+        union = dense > 0 if union is None else union | (dense > 0)
+        for i, counts in sparse_counts.items():
+            keys[i].update(k for k, c in counts.items() if c)
+    return union, keys
+
+
+def _pack_chunk(paths: List[str], digest: str, sparse: List[int], columns: np.ndarray, sparse_columns: Dict) -> Tuple:
+    num = len(columns) + sum(len(c) for c in sparse_columns.values())
+    hits = np.zeros((len(paths), num), dtype=bool)
+    for j, path in enumerate(paths):
+        _, dense, sparse_counts = _read_counters(path, digest, sparse)
+        hits[j, : len(columns)] = dense[columns] > 0
+        for i, counts in sparse_counts.items():
+            hits[j, [sparse_columns[i][k] for k, c in counts.items() if c]] = True
+    return [_test_name(p) for p in paths], np.packbits(hits, axis=1)
+
+
+def _map_chunks(func, paths: List[str], jobs: int | None, *args) -> List:
+    jobs = min(jobs or os.cpu_count() or 1, len(paths))
+    if jobs == 1:
+        return [func(paths, *args)]
+    chunk_size = -(-len(paths) // (jobs * 4))
+    chunks = [paths[i : i + chunk_size] for i in range(0, len(paths), chunk_size)]
+    with ProcessPoolExecutor(jobs) as executor:
+        return list(executor.map(func, chunks, *([a] * len(chunks) for a in args)))
+
+
+def rank(paths: Iterable[str], jobs: int | None = None) -> List[Tuple[str, int, int, float]]:
+    """
+    ranks tests by greedy set cover of hit bins of coverpoints and crosses, and returns
+    (test, number of newly hit bins, cumulative number of hit bins, cumulative coverage) of tests in order.
+    only tests hitting new bins are listed, so they hit the same bins as all tests.
+    paths:          paths of database files of tests. tests are named by "test" in meta, or their paths
+    jobs:           number of worker processes. os.cpu_count() if None, and no worker process if 1
+    """
+    paths = [str(p) for p in paths]
+    assert paths, "Error!! no coverage database to rank"
+    first = CoverageDB(paths[0])
+    sparse = [i for i, e in enumerate(first.entries) if _is_sparse(e)]
+    total = int(_coverable(first.entries, first.dense_size).sum())
+    bin_masks = _bin_masks(first.entries)
+    total += sum(int(np.prod([m.sum() for m in bin_masks[i]], dtype=object)) for i in sparse)
+
+    # bins never hit by any test are dropped from bitsets
+    union = np.zeros(first.dense_size, dtype=bool)
+    keys = {i: set() for i in sparse}
+    for chunk_union, chunk_keys in _map_chunks(_union_chunk, paths, jobs, first.fingerprint, sparse):
+        union |= chunk_union
+        for i in sparse:
+            keys[i] |= chunk_keys[i]
+    columns = np.flatnonzero(union & _coverable(first.entries, first.dense_size))
+    sparse_columns = dict()
+    offset = len(columns)
+    for i in sparse:
+        sparse_columns[i] = {k: offset + c for c, k in enumerate(sorted(keys[i]))}
+        offset += len(keys[i])
+
+    chunks = _map_chunks(_pack_chunk, paths, jobs, first.fingerprint, sparse, columns, sparse_columns)
+    tests = [name for names, _ in chunks for name in names]
+    bits = np.concatenate([b for _, b in chunks])
+
+    # lazy greedy: a gain only decreases as bins are covered, so the gain of a test is recomputed only
+    # when its previous gain is the largest
+    covered = np.zeros(bits.shape[1], dtype=np.uint8)
+    heap = [(-int(g), i) for i, g in enumerate(popcount(bits)) if g > 0]
+    heapq.heapify(heap)
+    ranking = []
+    cumulative = 0
+    while heap:
+        _, i = heapq.heappop(heap)
+        gain = int(popcount(bits[i] & ~covered))
+        if gain == 0:
+            continue
+        if heap and gain < -heap[0][0]:
+            heapq.heappush(heap, (-gain, i))
+            continue
+        covered |= bits[i]
+        cumulative += gain
+        ranking.append((tests[i], gain, cumulative, 100 * cumulative / total if total else 100.0))
+    return ranking
+
+
+class SharedCounters:
+    def __init__(self, path: str, models):
+        """
+        path:           path of database file shared by processes, created with zero counters if it doesn't exist.
+                        counters are memory-mapped, so every process sees the live sum of all processes
+        models:         coverage models (or covergroups) counted in python. sparse crosses can't be shared
+        """
+        self.path = str(path)
+        self.models = _as_models(models)
+        self.counters = list(_counters(self.models))
+        entries = structure(self.models)
+        for e in entries:
+            assert not _is_sparse(e), f"Error!! sparse cross {e['name']} can't be shared, raise its dense_limit"
+
+        with self.lock():
+            if not os.path.isfile(self.path) or os.path.getsize(self.path) == 0:
+                write_blocks(self.path, entries, [_counter_block(v.snapshot()) * 0 for v in self.counters])
+        self.db = CoverageDB(self.path)
+        assert self.db.fingerprint == fingerprint(entries), (
+            f"Error!! {self.path} is shared by different coverage models ({self.db.fingerprint})"
+        )
+        self.shared = np.memmap(self.path, dtype="<i8", mode="r+", offset=self.db.data_offset, shape=(self.db.size,))
+        self.flushed = self._local()
+        # counts not flushed yet of coverpoints and crosses which are reset since the last flush
+        self.pending = np.zeros(self.db.size, dtype=np.int64)
+        for v, e in zip(self.counters, self.db.entries):
+            v.add_reset_hook(partial(self._bank, entry=e))
+
+    def __repr__(self):
+        return f"{self.__class__.__name__}(path={self.path}, size={self.db.size})"
+
+    def lock(self):
+        """exclusive lock of processes sharing the database, held by a lock file next to it"""
+        return _FileLock(self.path + ".lock")
+
+    def _local(self) -> np.ndarray:
+        counters = [v.snapshot() for v in self.counters]
+        return np.concatenate(counters) if counters else np.zeros(0, dtype=np.int64)
+
+    def _bank(self, counter: CoverPoint | Cross, entry: Dict):
+        """keeps counts not flushed yet of a coverpoint or cross being reset, and flushes them at the next flush"""
+        block = slice(entry["offset"] // 8, entry["offset"] // 8 + entry["length"])
+        self.pending[block] += counter.snapshot() - self.flushed[block]
+        self.flushed[block] = 0
+
+    def flush(self) -> int:
+        """adds counters counted since the last flush to the shared counters. returns number of changed counters"""
+        local = self._local()
+        delta = local - self.flushed + self.pending
+        changed = np.flatnonzero(delta)
+        if len(changed):
+            with self.lock():
+                self.shared[changed] += delta[changed]
+        self.flushed = local
+        self.pending[:] = 0
+        return len(changed)
+
+    def snapshot(self, model: str = "") -> Dict[str, Dict]:
+        """live sum of counters of all processes, same as CoverageModel.snapshot()"""
+        return self.db.snapshot(model)
+
+
+class _FileLock:
+    def __init__(self, path: str):
+        self.path = path
+
+    def __enter__(self):
+        self.fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o666)
+        fcntl.flock(self.fd, fcntl.LOCK_EX)
+        return self
+
+    def __exit__(self, *args):
+        fcntl.flock(self.fd, fcntl.LOCK_UN)
+        os.close(self.fd)
+
+
+class Checkpoint:
+    def __init__(self, path: str, models, meta: Dict | None = None):
+        """
+        path:           path of database file where counters are saved
+        models:         coverage models (or covergroups) counted in python
+        meta:           json serializable information of the run, e.g. test name and seed
+        """
+        self.path = str(path)
+        self.models = _as_models(models)
+        self.meta = meta
+        self.counters = list(_counters(self.models))
+        self.saved = None
+        self.saves = 0
+        self.save()
+
+    def __repr__(self):
+        return f"{self.__class__.__name__}(path={self.path}, saves={self.saves})"
+
+    def _write_all(self):
+        """rewrites the whole database. a temporary file replaces it, so the previous one survives a crash"""
+        self.entries = structure(self.models)
+        self.sparse = [i for i, e in enumerate(self.entries) if _is_sparse(e)]
+        blocks = [_counter_block(v.snapshot()) for v in self.counters]
+        tmp = self.path + ".tmp"
+        reserve = 64 * len(self.sparse)
+        self.header_size = write_blocks(tmp, self.entries, blocks, self.meta, reserve=reserve)
+        os.replace(tmp, self.path)
+        self.data_offset = PREFIX.size + self.header_size
+        self.dense_end = sum(len(blocks[i]) * 8 for i, e in enumerate(self.entries) if not _is_sparse(e))
+        self.tail = self.dense_end, self.dense_end + sum(len(blocks[i]) * 8 for i in self.sparse)
+
+    def _write_tail(self, f) -> bool:
+        """
+        rewrites sparse crosses, which change their sizes, after dense counters. they are written to a free
+        region apart from the last ones, which stay valid until the header pointing to them is rewritten in place.
+        returns False if the header doesn't fit in its reserved size
+        """
+        blocks = [_counter_block(self.counters[i].snapshot()) for i in self.sparse]
+        size = sum(len(b) * 8 for b in blocks)
+        start = self.dense_end if self.dense_end + size <= self.tail[0] else self.tail[1]
+        offset = start
+        for i, block in zip(self.sparse, blocks):
+            self.entries[i]["offset"] = offset
+            self.entries[i]["length"] = len(block)
+            offset += len(block) * 8
+        header = _header(self.entries, self.meta)
+        if len(header) > self.header_size:
+            return False
+
+        f.seek(self.data_offset + start)
+        f.write(b"".join(b.astype("<i8", copy=False).tobytes() for b in blocks))
+        f.flush()
+        os.fsync(f.fileno())
+        f.seek(PREFIX.size)
+        f.write(header + b" " * (self.header_size - len(header)))
+        f.flush()
+        if start == self.dense_end:
+            f.truncate(self.data_offset + offset)
+        self.tail = start, offset
+        return True
+
+    def save(self) -> int:
+        """
+        writes counters changed since the last save to the database. returns number of written blocks.
+        dense counters are patched in place, and sparse crosses are rewritten at the end of the database
+        """
+        generations = [v.generation for v in self.counters]
+        if self.saved is None:
+            self._write_all()
+            dirty = list(range(len(self.counters)))
+        else:
+            dirty = [i for i, (new, old) in enumerate(zip(generations, self.saved)) if new != old]
+            with open(self.path, "r+b") as f:
+                for i in dirty:
+                    if not _is_sparse(self.entries[i]):
+                        f.seek(self.data_offset + self.entries[i]["offset"])
+                        f.write(_counter_block(self.counters[i].snapshot()).astype("<i8", copy=False).tobytes())
+                f.flush()
+                tail_written = not any(_is_sparse(self.entries[i]) for i in dirty) or self._write_tail(f)
+            if not tail_written:
+                self._write_all()
+        self.saved = generations
+        self.saves += 1
+        return len(dirty)
+
+
+def _names_at(compact: List, index: np.ndarray) -> List[str]:
+    """bin names at index of compact bin names, without expanding them"""
+    ends = np.cumsum([c[1] if isinstance(c, list) else 1 for c in compact])
+    items = np.searchsorted(ends, index, side="right")
+    names = []
+    for i, item in zip(index.tolist(), items.tolist()):
+        c = compact[item]
+        names.append(f"{c[0]}[{i - ends[item] + c[1]}]" if isinstance(c, list) else c)
+    return names
+
+
+def _diff_entry(a: CoverageDB, b: CoverageDB, key: Tuple[str, str, str], counts: bool) -> List[Dict]:
+    entry = a.entry(*key)
+    model, group, name = key
+    if entry["kind"] == "cross":
+        # bins of crosses are compared by flattened index, and only changed ones are named
+        if _is_sparse(entry) or _is_sparse(b.entry(*key)):
+            a_counts, b_counts = _as_sparse(a.counts(*key)), _as_sparse(b.counts(*key))
+            index = sorted(
+                k
+                for k in a_counts.keys() | b_counts.keys()
+                if (a_counts.get(k, 0) != b_counts.get(k, 0) if counts else (k in a_counts) != (k in b_counts))
+            )
+            index = np.array(index, dtype=np.int64)
+            a_values = [a_counts.get(k, 0) for k in index.tolist()]
+            b_values = [b_counts.get(k, 0) for k in index.tolist()]
+        else:
+            a_block, b_block = a.block(*key), b.block(*key)
+            index = np.flatnonzero(a_block != b_block if counts else (a_block > 0) != (b_block > 0))
+            a_values, b_values = a_block[index].tolist(), b_block[index].tolist()
+        ordinals = np.unravel_index(index, entry["dims"]) if len(index) else [index] * len(entry["dims"])
+        names = [_names_at(a.entry(model, group, cp)["bins"], o) for cp, o in zip(entry["coverpoints"], ordinals)]
+        bins = [list(n) for n in zip(*names)]
+    else:
+        a_block, b_block = a.block(*key), b.block(*key)
+        index = np.flatnonzero(a_block != b_block if counts else (a_block > 0) != (b_block > 0))
+        a_values, b_values = a_block[index].tolist(), b_block[index].tolist()
+        bins = _names_at(entry["bins"] + entry["ignore_bins"] + entry["illegal_bins"], index)
+    return [
+        {"model": model, "group": group, "name": name, "bin": n, "a": i, "b": j, "change": _change(i, j)}
+        for n, i, j in zip(bins, a_values, b_values)
+    ]
+
+
+def _as_sparse(counts) -> Dict[int, int]:
+    if isinstance(counts, dict):
+        return {k: c for k, c in counts.items() if c}
+    return {k: int(counts[k]) for k in np.flatnonzero(counts).tolist()}
+
+
+def _change(a: int, b: int) -> str:
+    if a == 0:
+        return "gained"
+    if b == 0:
+        return "lost"
+    return "increased" if b > a else "decreased"
+
+
+def _layout(entry: Dict) -> Dict:
+    return {k: v for k, v in entry.items() if k not in ("offset", "length", "format", "tests")}
+
+
+def diff(a: str | CoverageDB, b: str | CoverageDB, counts: bool = False) -> List[Dict]:
+    """
+    compares counters of two databases, and returns changed bins as dicts of
+    model, group, name (of coverpoint or cross), bin (name, or list of names for crosses), a, b (counts) and change.
+    coverpoints and crosses only in one database, or with different bins, are listed with bin None.
+    a, b:           databases or paths of them
+    counts:         lists bins whose counts changed. otherwise, only bins gained or lost
+    """
+    a = a if isinstance(a, CoverageDB) else CoverageDB(a)
+    b = b if isinstance(b, CoverageDB) else CoverageDB(b)
+    changes = []
+    for key in a.keys() + [k for k in b.keys() if k not in a]:
+        change = None
+        if key not in b:
+            change = "removed"
+        elif key not in a:
+            change = "added"
+        elif _layout(a.entry(*key)) != _layout(b.entry(*key)):
+            change = "changed"
+        if change:
+            changes.append({"model": key[0], "group": key[1], "name": key[2], "bin": None, "change": change})
+        elif not np.array_equal(a.block(*key), b.block(*key)):
+            changes += _diff_entry(a, b, key, counts)
+    return changes
+
+
+def diff_markdown(changes: List[Dict]) -> str:
+    lines = ["| Model | Group | Name | Bin | A | B | Change |", "| --- | --- | --- | --- | --- | --- | --- |"]
+    for c in changes:
+        bin = "" if c["bin"] is None else c["bin"] if isinstance(c["bin"], str) else ", ".join(c["bin"])
+        a, b = c.get("a", ""), c.get("b", "")
+        lines.append(f"| {c['model']} | {c['group']} | {c['name']} | {bin} | {a} | {b} | {c['change']} |")
+    return "\n".join(lines) + "\n"
@@ -1,11 +1,14 @@
 import os
 import sys
+import glob
+import json
 import importlib.util
 from argparse import ArgumentParser
 from shutil import which
 
 from cocotbext.fcov import CoverageModel
 from cocotbext.fcov import traverse_type, get_markdown_list
+from cocotbext.fcov import db
 
 
 def traverse_coverage_models(cov_file, flatten=True):
@@ -19,6 +22,44 @@ def traverse_coverage_models(cov_file, flatten=True):
         yield from traverse_type(coverage_module, CoverageModel, flatten)
 
 
+def expand_db_files(inputs):
+    for i in inputs:
+        if os.path.isdir(i):
+            yield from sorted(glob.glob(os.path.join(i, "*.fcovdb")))
+        elif glob.has_magic(i):
+            yield from sorted(glob.glob(i))
+        else:
+            yield i
+
+
+def merge(args):
+    for output in [args.output, args.index]:
+        if output and os.path.isfile(output) and not args.overwrite:
+            raise FileExistsError(f"{output} already exists")
+    num = db.merge(list(expand_db_files(args.inputs)), args.output, jobs=args.jobs, index=args.index)
+    print(f"merged {num} coverage databases into {args.output}")
+
+
+def rank(args):
+    ranking = db.rank(list(expand_db_files(args.inputs)), jobs=args.jobs)
+    lines = [f"{test}\t{new}\t{cumulative}\t{coverage:.2f}" for test, new, cumulative, coverage in ranking]
+    if args.output is None:
+        print("\n".join(lines))
+    else:
+        with open(args.output, "w") as f:
+            f.write("".join(line + "\n" for line in lines))
+
+
+def diff(args):
+    changes = db.diff(args.a, args.b, counts=args.counts)
+    text = json.dumps(changes, indent=2) + "\n" if args.format == "json" else db.diff_markdown(changes)
+    if args.output is None:
+        print(text, end="")
+    else:
+        with open(args.output, "w") as f:
+            f.write(text)
+
+
 def main(append=False):
     parser = ArgumentParser()
     parser.add_argument(
@@ -33,8 +74,65 @@ def main(append=False):
     parser.add_argument(
         "--overwrite", "-w", default=False, action="store_true", help="force overwrite output files if they exist"
     )
+    subparsers = parser.add_subparsers(dest="command")
+
+    merge_parser = subparsers.add_parser(
+        "merge", fromfile_prefix_chars="@", help="merge coverage databases of tests into one database"
+    )
+    merge_parser.add_argument(
+        "inputs", nargs="+", help="coverage database files, directories or glob patterns. @FILE reads them from FILE"
+    )
+    merge_parser.add_argument(
+        "--output", "-o", default="merged.fcovdb", type=str, help="output file name for merged coverage database"
+    )
+    merge_parser.add_argument(
+        "--index", "-i", default=None, type=str, help="output file name for index of tests hitting each bin"
+    )
+    merge_parser.add_argument(
+        "--jobs", "-j", default=None, type=int, help="number of worker processes (default: number of CPUs)"
+    )
+    merge_parser.add_argument(
+        "--overwrite", "-w", default=False, action="store_true", help="force overwrite output files if they exist"
+    )
+
+    rank_parser = subparsers.add_parser(
+        "rank", fromfile_prefix_chars="@", help="rank tests contributing new coverage by greedy set cover"
+    )
+    rank_parser.add_argument(
+        "inputs", nargs="+", help="coverage database files, directories or glob patterns. @FILE reads them from FILE"
+    )
+    rank_parser.add_argument(
+        "--output",
+        "-o",
+        default=None,
+        type=str,
+        help="output file name for ranked tests with new bins, cumulative bins and coverage (default: stdout)",
+    )
+    rank_parser.add_argument(
+        "--jobs", "-j", default=None, type=int, help="number of worker processes (default: number of CPUs)"
+    )
+
+    diff_parser = subparsers.add_parser("diff", help="list bins gained or lost between two coverage databases")
+    diff_parser.add_argument("a", type=str, help="coverage database to compare from")
+    diff_parser.add_argument("b", type=str, help="coverage database to compare to")
+    diff_parser.add_argument(
+        "--format", "-t", default="md", choices=["md", "json"], help="output format, markdown or json (default: md)"
+    )
+    diff_parser.add_argument(
+        "--output", "-o", default=None, type=str, help="output file name for changed bins (default: stdout)"
+    )
+    diff_parser.add_argument(
+        "--counts", "-c", default=False, action="store_true", help="list bins whose counts changed, not only hits"
+    )
     args = parser.parse_args()
 
+    if args.command == "merge":
+        return merge(args)
+    if args.command == "rank":
+        return rank(args)
+    if args.command == "diff":
+        return diff(args)
+
     filelist = args.file.split(",")
     if os.path.isfile(args.sv_output) and not args.overwrite:
         raise FileExistsError(f"{args.sv_output} already exists")
@@ -0,0 +1,238 @@
+from __future__ import annotations
+
+import json
+import zlib
+import numpy as np
+from typing import Dict, Iterable, List, Tuple
+
+from .bins.table import as_value_array
+from .coverage import CoverGroup, to_int
+from . import db
+
+MAGIC = b"FCOVTRC\x01"
+CHUNK_SIZE = 1 << 16
+# zlib level of chunks, fast so that tracing doesn't slow down sample_many() of large arrays
+LEVEL = 1
+
+# file layout
+# - magic (8 bytes)
+# - chunks of samples of a covergroup, each of
+#   - chunk header size (uint64, little endian)
+#   - chunk header (json): model, group, number of rows, and name, dtype and compressed sizes of columns
+#   - zlib compressed values of columns in the smallest integer type, followed by their packed masks of unknown values
+#     if any
+#
+# chunks are appended as samples are recorded, so a trace of a crashed simulation is readable up to its last chunk
+
+
+def _concat(segments: List) -> Tuple[np.ndarray, np.ndarray]:
+    """concatenates buffered segments of a column: arrays of values, lists of int or None, or numbers of unknown rows"""
+    data, mask = [], []
+    for segment in segments:
+        if isinstance(segment, int):
+            data.append(np.zeros(segment, dtype=np.int64))
+            mask.append(np.ones(segment, dtype=bool))
+        elif isinstance(segment, list):
+            data.append(as_value_array([0 if v is None else v for v in segment]))
+            mask.append(np.array([v is None for v in segment], dtype=bool))
+        else:
+            data.append(segment)
+            mask.append(np.zeros(len(segment), dtype=bool))
+    if any(d.dtype == object for d in data):
+        data = [d.astype(object) for d in data]
+    return np.concatenate(data), np.concatenate(mask)
+
+
+def _encode(segments: List) -> Tuple[Dict, bytes, bytes]:
+    """
+    encodes a column as the smallest signed integer type, uint64 or signed little-endian bytes of fixed size, and
+    its mask of unknown values
+    """
+    data, mask = _concat(segments)
+    if data.dtype == np.int64 and len(data):
+        # stored in the smallest integer type holding the values, which is much faster to compress
+        lo, hi = int(data.min()), int(data.max())
+        for dtype in ("<i1", "<i2", "<i4"):
+            if np.iinfo(dtype).min <= lo and hi <= np.iinfo(dtype).max:
+                data = data.astype(dtype)
+                break
+    elif data.dtype == object:
+        known = data.tolist()
+        try:
+            data = np.array(known, dtype="<u8")
+        except OverflowError:
+            itemsize = max((v.bit_length() + 8) // 8 for v in known)
+            data = np.frombuffer(b"".join(v.to_bytes(itemsize, "little", signed=True) for v in known), dtype=np.uint8)
+            data = data.view(f"V{itemsize}")
+    packed_mask = np.packbits(mask, bitorder="little").tobytes() if mask.any() else b""
+    packed_mask = zlib.compress(packed_mask, LEVEL) if packed_mask else b""
+    return {"dtype": data.dtype.str}, zlib.compress(data.tobytes(), LEVEL), packed_mask
+
+
+def _decode(column: Dict, data: bytes, mask: bytes, rows: int) -> np.ma.MaskedArray:
+    values = np.frombuffer(zlib.decompress(data), dtype=column["dtype"])
+    if values.dtype.kind == "V":
+        values = np.array([int.from_bytes(v.tobytes(), "little", signed=True) for v in values], dtype=object)
+    if mask:
+        mask = np.unpackbits(np.frombuffer(zlib.decompress(mask), dtype=np.uint8), count=rows, bitorder="little")
+        return np.ma.MaskedArray(values, mask=mask.astype(bool))
+    return np.ma.MaskedArray(values, mask=np.zeros(rows, dtype=bool))
+
+
+class TraceWriter:
+    def __init__(self, path: str, models, chunk_size: int = CHUNK_SIZE):
+        """
+        path:           path of trace file
+        models:         coverage models (or covergroups) whose sampled values are recorded
+        chunk_size:     number of samples of a covergroup kept in memory before they are compressed and written
+        """
+        self.path = str(path)
+        self.chunk_size = chunk_size
+        self.file = open(self.path, "wb")
+        self.file.write(MAGIC)
+        self.rows = 0
+
+        # (model, group, (name, key, index, coverpoint) of coverpoints, segments of columns) by id of covergroup.
+        # values of sample() are appended to a list, and arrays of sample_many() are kept as they are until written
+        self.buffers = dict()
+        self.pending = dict()
+        self.covergroups = []
+        for model in db._as_models(models):
+            for model_name, cg in db._covergroups(model):
+                coverpoints = [(cp.name, k, i, cp) for k, cp, i in cg._traverse_coverpoint()]
+                self.buffers[id(cg)] = model_name, cg.name, coverpoints, [[] for _ in coverpoints]
+                self.pending[id(cg)] = 0
+                self.covergroups.append(cg)
+                cg.set_trace(self)
+
+    def __repr__(self):
+        return f"{self.__class__.__name__}(path={self.path}, rows={self.rows})"
+
+    def record(self, cg: CoverGroup, values: Dict):
+        """records sampled values of a covergroup keyed by coverpoint name, as CoverGroup.get()"""
+        _, _, coverpoints, columns = self.buffers[id(cg)]
+        for (_, k, i, _), segments in zip(coverpoints, columns):
+            value = values.get(k, None)
+            if i is not None and value is not None:
+                value = value[i]
+            if not segments or not isinstance(segments[-1], list):
+                segments.append([])
+            segments[-1].append(to_int(value))
+        self._add_rows(id(cg), 1)
+
+    def record_many(self, cg: CoverGroup, columns: Dict[int, np.ndarray | None], rows: int):
+        """
+        records arrays of sampled values of a covergroup keyed by id of coverpoint, as CoverGroup.sample_many().
+        arrays are kept without copy, so they must not be modified after recorded
+        """
+        _, _, coverpoints, buffers = self.buffers[id(cg)]
+        for (*_, cp), segments in zip(coverpoints, buffers):
+            column = columns.get(id(cp), None)
+            segments.append(rows if column is None else column)
+        self._add_rows(id(cg), rows)
+
+    def _add_rows(self, key: int, rows: int):
+        self.pending[key] += rows
+        if self.pending[key] >= self.chunk_size:
+            self._write_chunk(key)
+
+    def _write_chunk(self, key: int):
+        model, group, coverpoints, columns = self.buffers[key]
+        rows = self.pending[key]
+        if not columns or not rows:
+            return
+        header = {"model": model, "group": group, "rows": rows, "columns": []}
+        payload = []
+        for (name, *_), segments in zip(coverpoints, columns):
+            info, data, mask = _encode(segments)
+            header["columns"].append({"name": name, **info, "size": len(data), "mask": len(mask)})
+            payload += [data, mask]
+            segments.clear()
+        header = json.dumps(header, separators=(",", ":")).encode()
+        self.file.write(len(header).to_bytes(8, "little") + header + b"".join(payload))
+        self.file.flush()
+        self.pending[key] = 0
+        self.rows += rows
+
+    def flush(self):
+        """writes samples kept in memory to the trace file"""
+        for key in self.buffers:
+            self._write_chunk(key)
+
+    def close(self):
+        """writes samples kept in memory, closes the trace file and stops recording"""
+        if self.file.closed:
+            return
+        self.flush()
+        self.file.close()
+        for cg in self.covergroups:
+            cg.set_trace(None)
+
+
+def read(path: str) -> Iterable[Tuple[str, str, Dict[str, np.ma.MaskedArray]]]:
+    """
+    yields (model, group, columns) of chunks of a trace file, where columns are masked arrays of sampled values
+    keyed by coverpoint name. unknown values (None, x, z) are masked
+    """
+    with open(path, "rb") as f:
+        assert f.read(len(MAGIC)) == MAGIC, f"Error!! {path} is not a trace file"
+        while True:
+            size = f.read(8)
+            if len(size) < 8:
+                return
+            header = f.read(int.from_bytes(size, "little"))
+            try:
+                header = json.loads(header)
+                payload = [(f.read(c["size"]), f.read(c["mask"])) for c in header["columns"]]
+                columns = {
+                    c["name"]: _decode(c, data, mask, header["rows"])
+                    for c, (data, mask) in zip(header["columns"], payload)
+                }
+            except (ValueError, zlib.error):
+                # the last chunk written by a crashed simulation
+                return
+            yield header["model"], header["group"], columns
+
+
+def replay(path: str, models) -> int:
+    """
+    counts sampled values of a trace file into coverage models in python with sample_many(), e.g. to see the
+    coverage of edited bins without simulation. covergroups are matched by name (and model name, if models are
+    many), and coverpoints by name. returns number of replayed samples
+    path:           path of trace file
+    models:         coverage models (or covergroups)
+    """
+    models = db._as_models(models)
+    covergroups = dict()
+    for model in models:
+        for model_name, cg in db._covergroups(model):
+            covergroups[(model_name if len(models) > 1 else None, cg.name)] = cg
+
+    rows = 0
+    for model_name, group, columns in read(path):
+        cg = covergroups.get((model_name if len(models) > 1 else None, group))
+        if cg is None:
+            continue
+        coverpoints = [(cp.name, k, i) for k, cp, i in cg._traverse_coverpoint()]
+        names = [name for name, _, _ in coverpoints if name in columns]
+        if not names:
+            continue
+
+        # rows are replayed in runs of the same unknown values, so that the order of samples is kept for transitions
+        mask = np.stack([np.ma.getmaskarray(columns[name]) for name in names], axis=1)
+        change = np.flatnonzero(np.any(mask[1:] != mask[:-1], axis=1)) + 1
+        bounds = [0, *change.tolist(), len(mask)]
+        for start, end in zip(bounds[:-1], bounds[1:]):
+            known = {name: not m for name, m in zip(names, mask[start].tolist())}
+            sample_columns = dict()
+            for name, k, i in coverpoints:
+                if name not in columns:
+                    continue
+                column = columns[name].data[start:end] if known[name] else None
+                if i is None:
+                    sample_columns[k] = column
+                else:
+                    sample_columns.setdefault(k, [None] * len(cg._get_connected_coverpoints()[k]))[i] = column
+            cg.sample_many(**sample_columns)
+        rows += len(mask)
+    return rows
@@ -0,0 +1,244 @@
+from __future__ import annotations
+
+import numpy as np
+from datetime import datetime
+from itertools import groupby
+from typing import Dict, Iterable, List, Tuple
+from xml.etree.ElementTree import iterparse
+from xml.sax.saxutils import escape, quoteattr
+
+from .coverage import Cross
+from . import db
+
+UCIS_NS = "http://www.accellera.org/XMLSchema/UCIS"
+CHUNK_SIZE = 1 << 12
+BIN_TYPES = {"bins": "bins", "ignore_bins": "ignore", "illegal_bins": "illegal"}
+PARSED_TAGS = {
+    f"{{{UCIS_NS}}}{name}"
+    for name in ["historyNodes", "instanceCoverages", "cgInstance", "coverpoint", "coverpointBin", "cross", "crossBin"]
+}
+
+# coverage hierarchy in ucis xml
+# - instanceCoverages:      coverage model
+# - cgInstance:             covergroup
+# - coverpoint:             coverpoint, with coverpointBin of bins (default bins are of type default), ignore_bins and
+#                           illegal_bins
+# - cross:                  cross, with crossBin of cross bins. sparse crosses have only hit cross bins
+#
+# coverpointBin has a range of values per interval of the bin, and its count is in the first range. written from
+# coverage models, ranges are the values of bins. a database keeps only names of bins, so written from a database, and
+# for default, transition and wildcard bins which have no value range, a bin has a single range from -1 to -1
+
+
+def _tag(name: str) -> str:
+    return f"{{{UCIS_NS}}}{name}"
+
+
+def _attrs(**attrs) -> str:
+    return "".join(f" {k}={quoteattr(str(v))}" for k, v in attrs.items())
+
+
+def _source(source) -> Tuple[List[Dict], Iterable, Dict]:
+    """
+    entries, (counters, value ranges of bins or None) of entries and meta of a database, its path, or coverage models
+    """
+    if isinstance(source, str) or hasattr(source, "__fspath__"):
+        source = db.CoverageDB(source)
+    if isinstance(source, db.CoverageDB):
+        counters = ((source.counts(e["model"], e["group"], e["name"]), None) for e in source.entries)
+        return source.entries, counters, source.meta
+    models = db._as_models(source)
+    return db.structure(models), ((v.snapshot(), _ranges(v)) for v in db._counters(models)), dict()
+
+
+def _ranges(v) -> List[List[Tuple[int, int]]] | None:
+    """value ranges of bins, ignore_bins and illegal_bins of a coverpoint, or None for a cross"""
+    if isinstance(v, Cross):
+        return None
+    return v.bins.ranges() + v.ignore_bins.ranges() + v.illegal_bins.ranges()
+
+
+def _cross_bins(entry: Dict, counts, names: List[List[str]]) -> Iterable[str]:
+    if isinstance(counts, dict):
+        keys = np.array(sorted(counts), dtype=np.int64)
+        values = np.array([counts[k] for k in keys.tolist()], dtype=np.int64)
+    else:
+        keys, values = None, counts
+    # cross bins are named in chunks, so memory stays flat for large crosses
+    for start in range(0, len(values), CHUNK_SIZE):
+        chunk = values[start : start + CHUNK_SIZE]
+        index = np.arange(start, start + len(chunk)) if keys is None else keys[start : start + CHUNK_SIZE]
+        ordinals = np.stack(np.unravel_index(index, entry["dims"]), axis=1).tolist()
+        for key, o, count in zip(index.tolist(), ordinals, chunk.tolist()):
+            name = "<" + ",".join(n[i] for n, i in zip(names, o)) + ">"
+            yield (
+                f'<ucis:crossBin{_attrs(name=name, key=key)}>'
+                + "".join(f"<ucis:index>{i}</ucis:index>" for i in o)
+                + f'<ucis:contents coverageCount="{count}"/></ucis:crossBin>\n'
+            )
+
+
+def _coverpoint(entry: Dict, counts, ranges: List[List[Tuple[int, int]]] | None, key: int) -> Iterable[str]:
+    yield f"<ucis:coverpoint{_attrs(name=entry['name'], key=key)}>\n"
+    position = 0
+    default = set(entry.get("default", []))
+    for section in BIN_TYPES:
+        for name in db.expand_names(entry[section]):
+            bin_type = "default" if position in default else BIN_TYPES[section]
+            counts_of_ranges = [int(counts[position])]
+            bin_ranges = (ranges[position] if ranges else None) or [(-1, -1)]
+            counts_of_ranges += [0] * (len(bin_ranges) - 1)
+            yield (
+                f"<ucis:coverpointBin{_attrs(name=name, type=bin_type, key=position)}>"
+                + "".join(
+                    f'<ucis:range from="{lo}" to="{hi}"><ucis:contents coverageCount="{count}"/></ucis:range>'
+                    for (lo, hi), count in zip(bin_ranges, counts_of_ranges)
+                )
+                + "</ucis:coverpointBin>\n"
+            )
+            position += 1
+    yield "</ucis:coverpoint>\n"
+
+
+def iter_xml(source, test: str | None = None) -> Iterable[str]:
+    """
+    yields ucis xml of coverage results piece by piece.
+    source:         coverage database, its path, or coverage models (or covergroups) counted in python
+    test:           name of test in history node. "test" in meta of database by default
+    """
+    entries, counters, meta = _source(source)
+    test = test or meta.get("test", "fcov")
+    now = datetime.now().strftime("%Y%m%d%H%M%S")
+    yield '<?xml version="1.0" encoding="UTF-8"?>\n'
+    yield f'<ucis:UCIS xmlns:ucis="{UCIS_NS}" ucisVersion="1.0" writtenBy="cocotbext-fcov" writtenTime="{now}">\n'
+    yield '<ucis:sourceFiles fileName="" id="1"/>\n'
+    yield (
+        f'<ucis:historyNodes historyNodeId="0"{_attrs(logicalName=test, physicalName=test)} kind="test"'
+        f' testStatus="true" date="{now}" toolCategory="fcov" ucisVersion="1.0" vendorId="cocotbext"'
+        ' vendorTool="cocotbext-fcov" vendorToolVersion="" sameTests="1"/>\n'
+    )
+
+    counters = iter(counters)
+    for instance_id, (model, model_entries) in enumerate(groupby(entries, key=lambda e: e["model"])):
+        attrs = _attrs(name=model, key=instance_id, instanceId=instance_id, moduleName=model)
+        yield f"<ucis:instanceCoverages{attrs}>\n"
+        yield '<ucis:id file="1" line="1" inlineCount="1"/>\n<ucis:covergroupCoverage>\n'
+        for group_key, (group, group_entries) in enumerate(groupby(model_entries, key=lambda e: e["group"])):
+            yield f"<ucis:cgInstance{_attrs(name=group, key=group_key)}>\n"
+            yield f"<ucis:cgId{_attrs(cgName=group, moduleName=model)}>"
+            yield '<ucis:cginstSourceId file="1" line="1" inlineCount="1"/>'
+            yield '<ucis:cgSourceId file="1" line="1" inlineCount="1"/></ucis:cgId>\n'
+            names = dict()
+            for key, entry in enumerate(group_entries):
+                counts, ranges = next(counters)
+                if entry["kind"] == "coverpoint":
+                    names[entry["name"]] = db.expand_names(entry["bins"])
+                    yield from _coverpoint(entry, counts, ranges, key)
+                else:
+                    yield f"<ucis:cross{_attrs(name=entry['name'], key=key)}>\n"
+                    for cp in entry["coverpoints"]:
+                        yield f"<ucis:crosspointName>{escape(cp)}</ucis:crosspointName>"
+                    yield f'<ucis:userAttr key="format" type="str">{entry["format"]}</ucis:userAttr>\n'
+                    yield from _cross_bins(entry, counts, [names[cp] for cp in entry["coverpoints"]])
+                    yield "</ucis:cross>\n"
+            yield "</ucis:cgInstance>\n"
+        yield "</ucis:covergroupCoverage>\n</ucis:instanceCoverages>\n"
+    yield "</ucis:UCIS>\n"
+
+
+def write(path: str, source, test: str | None = None):
+    """
+    writes coverage results to a ucis xml file, without building the whole document in memory.
+    path:           path of ucis xml file
+    source:         coverage database, its path, or coverage models (or covergroups) counted in python
+    test:           name of test in history node. "test" in meta of database by default
+    """
+    with open(path, "w", encoding="utf-8") as f:
+        f.writelines(iter_xml(source, test))
+
+
+def read(path: str, output: str, meta: Dict | None = None):
+    """
+    reads a ucis xml file written by write() incrementally, and writes its counters to a coverage database.
+    path:           path of ucis xml file
+    output:         path of coverage database
+    meta:           json serializable information of the database. name of test in history node by default
+    """
+    entries = []
+    blocks = []
+    stack = []
+    test = None
+    for event, elem in iterparse(path, events=("start", "end")):
+        if event == "start":
+            stack.append(elem)
+            if elem.tag == _tag("instanceCoverages"):
+                model = elem.get("name")
+            elif elem.tag == _tag("cgInstance"):
+                group = elem.get("name")
+                bin_names = dict()
+            elif elem.tag == _tag("coverpoint"):
+                bins = {section: [] for section in BIN_TYPES}
+                default = []
+                counts = []
+            elif elem.tag == _tag("cross"):
+                crosspoints = []
+                cross_format = None
+                cross_counts = None
+            continue
+
+        stack.pop()
+        if elem.tag == _tag("historyNodes"):
+            test = elem.get("logicalName")
+        elif elem.tag == _tag("coverpointBin"):
+            if elem.get("type") == "default":
+                default.append(len(bins["bins"]))
+            section = next((k for k, v in BIN_TYPES.items() if v == elem.get("type")), "bins")
+            bins[section].append(elem.get("name"))
+            contents = elem.iterfind(f"{_tag('range')}/{_tag('contents')}")
+            counts.append(sum(int(c.get("coverageCount")) for c in contents))
+        elif elem.tag == _tag("coverpoint"):
+            bin_names[elem.get("name")] = bins["bins"]
+            entry = {"model": model, "group": group, "name": elem.get("name"), "kind": "coverpoint"}
+            entries.append({**entry, **{k: db.compact_names(v) for k, v in bins.items()}})
+            if default:
+                entries[-1]["default"] = default
+            blocks.append(np.array(counts, dtype=np.int64))
+        elif elem.tag == _tag("crosspointName"):
+            crosspoints.append(elem.text)
+        elif elem.tag == _tag("userAttr") and elem.get("key") == "format":
+            cross_format = elem.text
+        elif elem.tag == _tag("crossBin"):
+            if cross_counts is None:
+                dims = [len(bin_names[cp]) for cp in crosspoints]
+                cross_counts = dict() if cross_format == "sparse" else np.zeros(int(np.prod(dims)), dtype=np.int64)
+            key = 0
+            for i, dim in zip(elem.iterfind(_tag("index")), dims):
+                key = key * dim + int(i.text)
+            cross_counts[key] = int(elem.find(_tag("contents")).get("coverageCount"))
+        elif elem.tag == _tag("cross"):
+            dims = [len(bin_names[cp]) for cp in crosspoints]
+            cross_format = cross_format or ("dense" if np.prod(dims, dtype=object) <= 1 << 20 else "sparse")
+            if cross_counts is None:
+                cross_counts = dict() if cross_format == "sparse" else np.zeros(int(np.prod(dims)), dtype=np.int64)
+            entries.append(
+                {
+                    "model": model,
+                    "group": group,
+                    "name": elem.get("name"),
+                    "kind": "cross",
+                    "coverpoints": crosspoints,
+                    "dims": dims,
+                    "format": cross_format,
+                }
+            )
+            if isinstance(cross_counts, dict):
+                cross_counts = {k: c for k, c in cross_counts.items() if c}
+            blocks.append(db._counter_block(cross_counts))
+
+        # parsed elements are removed from their parents, so memory stays flat
+        if elem.tag in PARSED_TAGS:
+            elem.clear()
+            if stack:
+                stack[-1].remove(elem)
+
+    db.write_blocks(output, entries, blocks, {"test": test} if meta is None else meta)
@@ -1,4 +1,5 @@
 import pytest
+import numpy as np
 from cocotbext.fcov import BinGroup, BinCustom
 
 
@@ -175,3 +176,80 @@ def test_add():
         == "bins test_a = {-11};\nbins bin_neg10_9 = {[-10:9]};\nbins test_c[5] = {[10:19]} with (item % 2 == 0);"
     )
     assert bin_group.markdown() == "-11, [-10:9], 10, 12, 14, 16, 18"
+
+
+def test_compile():
+    bin_list = [
+        ("test_a", -11),
+        (None, range(-10, 10), 0),
+        ("test_c", range(10, 20, 2), 3),
+        ("test_d", [5, range(0, 3), 15]),
+        (None, None),
+    ]
+    bin_group = BinGroup(bin_list)
+    table = bin_group.compile()
+    assert table.num == bin_group.num == len(bin_group.bin_names()) == 26
+    assert table.default == [25]
+    assert table.overlap
+
+    for value in range(-20, 30):
+        expected = []
+        offset = 0
+        for v in bin_group.values():
+            expected += [offset + i for i in v.index(value)]
+            offset += v.num
+        assert table.index(value) == (sorted(expected) if expected else [25])
+
+
+def test_compile_large():
+    bin_group = BinGroup([("test_a", range(1 << 16), 0), ("test_b", range(1 << 16), 3)])
+    table = bin_group.compile()
+    assert len(table.bounds) == 3
+    assert table.index(0) == [0, 65536]
+    assert table.index(21845) == [21845, 65537]
+    assert table.index(65535) == [65535, 65538]
+    assert table.index(1 << 16) == []
+
+
+def test_index_many():
+    bin_list = [
+        ("test_a", -11),
+        (None, range(-10, 10), 0),
+        ("test_c", range(10, 20, 2), 3),
+        ("test_d", [5, range(0, 3), 15]),
+        (None, None),
+    ]
+    table = BinGroup(bin_list).compile()
+    values = np.arange(-20, 30)
+    rows, ordinals = table.index_many(values)
+    assert list(zip(rows, ordinals)) == [(i, o) for i, v in enumerate(values) for o in table.index(int(v))]
+
+    table = BinGroup([("wide", range(1 << 70, (1 << 70) + 10), 0)]).compile()
+    rows, ordinals = table.index_many([0, (1 << 70) + 3, (1 << 70) + 10])
+    assert rows.tolist() == [1]
+    assert ordinals.tolist() == [3]
+
+
+def test_ranges():
+    bin_list = [
+        ("test_a", -11),
+        (None, range(-10, 10), 3),
+        ("test_c", range(10, 20, 2), 2),
+        ("test_d", [5, range(0, 3), 15, 3]),
+        (None, None),
+    ]
+    bin_group = BinGroup(bin_list)
+    assert len(bin_group.ranges()) == bin_group.num
+    assert bin_group.ranges() == [
+        [(-11, -11)],
+        [(-10, -5)],
+        [(-4, 1)],
+        [(2, 9)],
+        [(10, 10), (12, 12)],
+        [(14, 14), (16, 16), (18, 18)],
+        [(0, 3), (5, 5), (15, 15)],
+        [],
+    ]
+    table = bin_group.compile()
+    for ordinal, ranges in enumerate(bin_group.ranges()):
+        assert all(ordinal in table.index(v) for lo, hi in ranges for v in range(lo, hi + 1))
@@ -266,3 +266,41 @@ def test_keyword():
     bin_item = BinItem(range(10))
     for k in ["bins", "ignore_bins", "illegal_bins"]:
         assert bin_item.systemverilog(keyword=k) == f"{k} bin_0_9 = {{[0:9]}}"
+
+
+def test_index():
+    bin_item = BinItem([3, range(10, 20), 5], num=0)
+    assert bin_item.bin_names() == [f"bin_3_19[{i}]" for i in range(12)]
+    assert bin_item.index(3) == [0]
+    assert bin_item.index(15) == [6]
+    assert bin_item.index(5) == [11]
+    assert bin_item.index(7) == []
+
+    bin_item = BinItem(range(10), num=4)
+    assert [bin_item.index(i) for i in range(10)] == [[0], [0], [1], [1], [2], [2], [3], [3], [3], [3]]
+
+    bin_item = BinItem(range(0, 20, 5))
+    assert bin_item.bin_names() == ["bin_0_19"]
+    assert bin_item.index(10) == [0]
+    assert bin_item.index(11) == []
+
+
+def test_wildcard():
+    bin_item = BinItem("4'b1??0")
+    assert bin_item.items == ["4'b1??0"]
+    assert bin_item.min == 0b1000
+    assert bin_item.max == 0b1110
+    assert bin_item.num == 1
+    assert len(bin_item) == 4
+    assert bin_item.name == "bin_1xx0"
+    assert bin_item.systemverilog() == "wildcard bins bin_1xx0 = {4'b1??0}"
+    assert bin_item.systemverilog(keyword="illegal_bins") == "wildcard illegal_bins bin_1xx0 = {4'b1??0}"
+    assert [v for v in range(32) if bin_item.index(v)] == [0b1000, 0b1010, 0b1100, 0b1110]
+
+    bin_item = BinItem(["8'hF?", 3], name="high")
+    assert bin_item.wildcards(2) == [(-(1 << 8) | 0xF0, 0xF0, 2)]
+    assert bin_item.intervals(2) == [(3, 3, 2, 2, 2)]
+    assert bin_item.systemverilog() == "wildcard bins high = {8'hF?, 3}"
+
+    with pytest.raises(AssertionError):
+        BinItem("4'b1??0", num=2).wildcards()
@@ -602,3 +602,18 @@ def test_bin_transition():
 
     with pytest.raises(AssertionError):
         bin_transition = BinTransition(1, 2, 3)
+
+
+def test_bin_transition_table():
+    bin_transition = BinTransition((1, 2, range(3, 8)), (1, 1, 1), ([4, 5], 6), prefix="TRANSITION")
+    table = bin_transition.compile()
+    assert table.num == 3
+
+    values = [1, 2, 5, 1, 1, 1, 1, 4, 6, 5, 5, 6, 1, 2, 9]
+    hits = [table.index(v) for v in values]
+    assert hits == [[], [], [0], [], [], [1], [1], [], [2], [], [], [2], [], [], []]
+
+    table.reset()
+    rows, ordinals = table.index_many(values)
+    assert list(zip(rows.tolist(), ordinals.tolist())) == [(i, o) for i, hit in enumerate(hits) for o in hit]
+    assert len(table.transitions._state_list) < 10
@@ -1,4 +1,4 @@
-from cocotbext.fcov import CoverageModel
+from cocotbext.fcov import CoverageModel, CoverageCollector
 from cocotbext.fcov import CoverPoint, Cross, CoverGroup
 from cocotbext.fcov import (
     BinSingle,
@@ -49,3 +49,106 @@ def test_coverage_model():
 
     cov_model_2 = TestCoverage2()
     assert cov_model == cov_model_2
+
+
+def test_shared_sample():
+    class CoverGroupTest(CoverGroup):
+        cp_width = CoverPoint(BinUniform(width=4))
+
+    class TestCoverage(CoverageModel):
+        cg_a = CoverGroupTest()
+        cg_b = CoverGroupTest(backend="python")
+        cg_list = [CoverGroupTest(), CoverGroupTest(drive_mode="fifo", fifo_depth=2)]
+
+    cov_model = TestCoverage("cov_shared", shared_sample=True)
+    sv = cov_model.systemverilog()
+    assert sv.startswith("module cov_shared ();\nwire [2:0] cov_shared_sample;\n")
+    assert "wire cg_a_sample;" not in sv
+    assert "wire cg_b_sample;" in sv
+    assert "always@ (cov_shared_sample[0]) begin cg_a_inst.sample(); end" in sv
+    assert "always@ (cov_shared_sample[1]) begin cg_list_0_inst.sample(); end" in sv
+    assert "always@ (cov_shared_sample[2]) begin" in sv
+    assert "wire cg_a_sample;" in TestCoverage("cov_shared").systemverilog()
+
+    class Handle:
+        def __init__(self):
+            self.value = 0
+
+    covergroups = cov_model._shared_covergroups()
+    assert covergroups == [cov_model.cg_a, *cov_model.cg_list]
+    for _, cp, _ in cov_model.cg_a._traverse_coverpoint():
+        cp._handler = Handle()
+    cg_fifo = cov_model.cg_list[1]
+    cg_fifo._fifo_handler, cg_fifo._fifo_count_handler = Handle(), Handle()
+    cg_fifo._packed_slices = {id(cp): (0, 4) for _, cp, _ in cg_fifo._traverse_coverpoint()}
+    cg_fifo._packed_width = 4
+    cg_fifo._packed_value = 0
+
+    for value in range(3):
+        cov_model.cg_a(cp_width=value)
+        cov_model.cg_a.sample()
+        cg_fifo(cp_width=value)
+        cg_fifo.sample()
+    assert cov_model._toggle_shared_sample(covergroups) == 0b101
+    assert cov_model.cg_a.cp_width._handler.value == 0
+    assert cg_fifo._fifo_count_handler.value == 2
+    assert cov_model._toggle_shared_sample(covergroups) == 0b101
+    assert cov_model._toggle_shared_sample(covergroups) == 0b001
+    assert cov_model.cg_a.cp_width._handler.value == 2
+    assert cov_model._toggle_shared_sample(covergroups) == 0
+
+
+def test_standalone():
+    class CoverGroupTest(CoverGroup):
+        cp_width = CoverPoint(BinUniform(width=2))
+        cp_onehot = CoverPoint(BinOneHot(2), ref=cp_width)
+
+    class CoverGroupTest2(CoverGroup):
+        def __init__(self):
+            super().__init__(backend="both")
+            self.cp_single = CoverPoint(BinSingle(1))
+
+    class TestCoverage(CoverageModel):
+        cg_a = CoverGroupTest()
+        cg_list = [CoverGroupTest(), CoverGroupTest2()]
+
+    collector = CoverageCollector(None, {"cov_standalone": TestCoverage()})
+    cov_model = collector.cov_standalone
+    assert [cg.backend for _, cg, _ in cov_model._traverse_covergroup()] == ["simulator", "simulator", "both"]
+    assert all(cg._count_in_python and not cg._drive_simulator for _, cg, _ in cov_model._traverse_covergroup())
+
+    for value in [0, 1, 2]:
+        cov_model.cg_a(cp_width=value)
+        cov_model.cg_a.sample()
+    cov_model.cg_list[1](cp_single=1)
+    cov_model.cg_list[1].sample()
+    assert cov_model.cg_a.coverage() == (75 + 100) / 2
+    assert cov_model.cg_list[0].coverage() == 0
+    assert cov_model.coverage() == (87.5 + 0 + 100) / 3
+    assert collector.coverage() == {"cov_standalone": cov_model.coverage()}
+    assert not cov_model.cg_a._sample_values
+
+    snapshot = cov_model.snapshot()
+    cov_model.reset()
+    assert cov_model.coverage() == 0
+    cov_model.merge(snapshot)
+    assert cov_model.coverage() == (87.5 + 0 + 100) / 3
+
+    # without the coverage instance in dut, only covergroups counting in python keep counting
+    class Dut:
+        pass
+
+    cov_model.reset()
+    cov_model.connect(Dut())
+    assert [cg.backend for _, cg, _ in cov_model._traverse_covergroup()] == ["simulator", "simulator", "both"]
+    cov_model.cg_a(cp_width=1)
+    cov_model.cg_a.sample()
+    cov_model.cg_list[1](cp_single=1)
+    cov_model.cg_list[1].sample()
+    assert cov_model.cg_a.coverage() == 0
+    assert cov_model.cg_list[1].coverage() == 100
+    assert not cov_model.cg_a._sample_values and not cov_model.cg_list[1]._sample_values
+
+    cov_model.connect(None)
+    cov_model.cg_a.sample()
+    assert cov_model.cg_a.coverage() > 0
@@ -1,3 +1,7 @@
+import numpy as np
+import pytest
+from copy import deepcopy
+from cocotb.binary import BinaryValue
 from cocotbext.fcov import CoverPoint, Cross, CoverGroup
 from cocotbext.fcov import (
     BinSingle,
@@ -7,6 +11,36 @@ from cocotbext.fcov import (
 )
 
 
+class Handle:
+    def __init__(self):
+        self.writes = []
+
+    @property
+    def value(self):
+        return self.writes[-1]
+
+    @value.setter
+    def value(self, value):
+        self.writes.append(value)
+
+
+class SignalHandle(Handle):
+    """handle of a simulator signal, whose value is read as BinaryValue"""
+
+    def __init__(self, width: int):
+        super().__init__()
+        self.width = width
+
+    @property
+    def value(self):
+        value = self.writes[-1]
+        return BinaryValue(value if isinstance(value, str) else f"{value:0{self.width}b}")
+
+    @value.setter
+    def value(self, value):
+        self.writes.append(value)
+
+
 def assertion_check(inst: CoverGroup):
     name = inst.name
     wire = (
@@ -204,3 +238,292 @@ def test_inheritance(width=4):
     assert cg_test1 == cg_test2
     assert cg_test1 == cg_test3
     assert cg_test2 == cg_test2
+
+    # options and states have defaults even if CoverGroup.__init__ is not called
+    assert (cg_test3.backend, cg_test3.drive_mode, cg_test3.samples) == ("simulator", "signal", 0)
+    cg_test3.add_sample_hook(lambda num: None)
+    assert len(cg_test3._sample_hooks) == 1 and not cg_test2._sample_hooks
+
+
+def test_python_backend(width=4):
+    class CoverGroupTest(CoverGroup):
+        cp_width = CoverPoint(BinUniform(width=width))
+        cp_onehot = CoverPoint(BinOneHot(width), ref=cp_width)
+        cp_single_list = [CoverPoint(BinSingle(i)) for i in range(0, 50, 10)]
+
+    cg = CoverGroupTest(name="cg_python", backend="python")
+    cg.connect(None)
+    for value in [1, 2, 3, 8]:
+        cg.set(values=dict(), cp_width=value, cp_single_list=[0, 10, 0, 30, 40])
+        cg.sample()
+
+    assert sum(c > 0 for c in cg.cp_width.hits.values()) == 4
+    assert cg.cp_onehot.hits == {"bin_0x1": 1, "bin_0x2": 1, "bin_0x4": 0, "bin_0x8": 1}
+    assert [cp.coverage() for cp in cg.cp_single_list] == [100, 100, 0, 100, 100]
+    assert cg.coverage() == (25 + 75 + 400) / 7
+    assert not cg._sample_values
+
+    cg.reset()
+    assert cg.coverage() == 0
+
+
+def test_sample_many(width=4):
+    class CoverGroupTest(CoverGroup):
+        cp_width = CoverPoint(BinUniform(width=width), ignore_bins=[0], illegal_bins=[15])
+        cp_onehot = CoverPoint(BinOneHot(width), ref=cp_width)
+        cp_bitwise = CoverPoint(BinBitwise(width), ref=cp_width)
+        cp_uniform_list = [CoverPoint(BinUniform(-100, 100, 5, num=4)) for _ in range(2)]
+
+        cx_onehot_uniform = Cross([cp_onehot, cp_uniform_list[0]])
+        cx_bitwise_uniform = Cross([cp_bitwise, cp_uniform_list[0], cp_uniform_list[1]])
+
+    rng = np.random.default_rng(0)
+    cp_width = rng.integers(0, 1 << width, 1000)
+    cp_uniform_list = rng.integers(-120, 120, (2, 1000))
+
+    cg_many = CoverGroupTest(name="cg_many", backend="python")
+    cg_many.sample_many(cp_width=cp_width, cp_uniform_list=cp_uniform_list)
+
+    cg_single = CoverGroupTest(name="cg_single", backend="python")
+    for i in range(1000):
+        cg_single.set(values=dict(), cp_width=cp_width[i], cp_uniform_list=list(cp_uniform_list[:, i]))
+        cg_single.sample()
+
+    for (_, cp_many, _), (_, cp_single, _) in zip(cg_many._traverse_coverpoint(), cg_single._traverse_coverpoint()):
+        assert cp_many.hits == cp_single.hits
+        assert cp_many.illegal_hits == cp_single.illegal_hits
+    # crosses cached for sampling are not traversed as crosses of the covergroup
+    assert len(list(cg_single._traverse_cross())) == len(cg_single._get_connected_crosses()) == 2
+    for (_, cx_many, _), (_, cx_single, _) in zip(cg_many._traverse_cross(), cg_single._traverse_cross()):
+        assert cx_many.hits == cx_single.hits
+        assert cx_many.hits
+        assert cx_many.is_dense and cx_many._dense
+
+    samples = cg_many.samples
+    with pytest.raises(ValueError, match="different lengths"):
+        cg_many.sample_many(cp_width=cp_width[:4], cp_uniform_list=cp_uniform_list[:, :1])
+    with pytest.raises(ValueError, match="different lengths"):
+        cg_many.sample_many(cp_uniform_list=[cp_uniform_list[0, :4], cp_uniform_list[1, :3]])
+    assert cg_many.samples == samples
+
+
+def test_python_only_bitwise(width=4):
+    class CoverGroupTest(CoverGroup):
+        cp_width = CoverPoint(BinUniform(width=width))
+        cp_bitwise = CoverPoint(BinBitwise(width), ref=cp_width)
+        cp_data = CoverPoint(BinBitwise(width))
+
+        cx_bitwise = Cross([cp_bitwise, cp_width])
+
+    cg_simulator = CoverGroupTest(name="cg_bitwise")
+    assert "cp_bitwise_0: coverpoint" in cg_simulator.sv_declare()
+    assert "cg_bitwise_cp_data" in cg_simulator.sv_wire()
+
+    cg_both = CoverGroupTest(name="cg_bitwise", backend="both")
+    assert cg_both.sv_wire() == f"wire [{width - 1}:0] cg_bitwise_cp_width;\nwire cg_bitwise_sample;"
+    assert cg_both.sv_declare() == (
+        "covergroup cg_bitwise;\n"
+        "cp_width: coverpoint cg_bitwise_cp_width {\n"
+        "bins bin_0_15[] = {[0:15]};}\n"
+        "endgroup : cg_bitwise"
+    )
+
+    cg_both.set(values=dict(), cp_width=3, cp_data=8)
+    cg_both._count(cg_both.get())
+    assert cg_both.cp_bitwise.bit_counts.tolist() == [[0, 1], [0, 1], [1, 0], [1, 0]]
+    assert cg_both.cp_data.bit_counts.tolist() == [[1, 0], [1, 0], [1, 0], [0, 1]]
+
+
+def test_on_illegal(width=4):
+    class CoverGroupTest(CoverGroup):
+        cp_width = CoverPoint(BinUniform(width=width), illegal_bins=[15])
+        cp_onehot = CoverPoint(BinOneHot(width), ref=cp_width)
+
+    with pytest.raises(ValueError, match="on_illegal"):
+        CoverGroupTest(name="cg_illegal", on_illegal="warn")
+
+    cg = CoverGroupTest(name="cg_illegal", on_illegal="error")
+    assert cg.cp_width.on_illegal == "error"
+    cg.set(values=dict(), cp_width=3)
+    cg.sample()
+    assert len(cg._sample_values) == 1
+    assert sum(cg.cp_width.hits.values()) == 0
+
+    cg.set(values=dict(), cp_width=15)
+    with pytest.raises(AssertionError):
+        cg.sample()
+    assert len(cg._sample_values) == 1
+
+
+def test_sample_queue(width=4):
+    class CoverGroupTest(CoverGroup):
+        cp_width = CoverPoint(BinUniform(width=width))
+
+    cg = CoverGroupTest(name="cg_queue")
+    for value in range(100):
+        cg.set(values=dict(), cp_width=value % 16)
+        cg.sample()
+    assert cg.queue_depth() == cg.queue_high_water == 100
+    assert cg.queue_dropped == 0
+
+    for policy, expected in [("drop", [7, 8, 9]), ("coalesce", [0, 1, 9])]:
+        cg = CoverGroupTest(name="cg_queue", queue_size=3, queue_policy=policy)
+        for value in range(10):
+            cg.set(values=dict(), cp_width=value)
+            cg.sample()
+        assert [v["cp_width"] for v in cg._sample_values] == expected
+        assert cg.queue_high_water == 3
+        assert cg.queue_dropped == 7
+
+    cg = CoverGroupTest(name="cg_queue", queue_size=2)
+    cg.sample()
+    cg.sample()
+    assert cg.queue_full()
+    with pytest.raises(AssertionError):
+        cg.sample()
+    assert cg.queue_depth() == 2
+
+    cg_copy = deepcopy(cg)
+    assert cg_copy.queue_depth() == 0
+
+
+def test_packed_drive(width=4):
+    class CoverGroupTest(CoverGroup):
+        cp_width = CoverPoint(BinUniform(width=width))
+        cp_onehot = CoverPoint(BinOneHot(width), ref=cp_width)
+        cp_single_list = [CoverPoint(BinSingle(i)) for i in [1, 20]]
+
+    cg = CoverGroupTest(name="cg_packed", drive_mode="packed")
+    assert cg.sv_wire() == (
+        "wire [9:0] cg_packed_packed;\n"
+        "wire cg_packed_cp_single_list_0;\n"
+        "assign cg_packed_cp_single_list_0 = cg_packed_packed[0];\n"
+        "wire [4:0] cg_packed_cp_single_list_1;\n"
+        "assign cg_packed_cp_single_list_1 = cg_packed_packed[5:1];\n"
+        "wire [3:0] cg_packed_cp_width;\n"
+        "assign cg_packed_cp_width = cg_packed_packed[9:6];\n"
+        "wire cg_packed_sample;"
+    )
+
+    cg._packed_handler = Handle()
+    cg._packed_slices = {id(v): (offset, width) for v, offset, width in cg._packed_layout()}
+    cg._drive(dict(cp_width=0, cp_single_list=[0, 0]))
+    assert cg._packed_handler.writes == [0]
+    cg._drive(dict(cp_width=5, cp_single_list=[1, 20]))
+    assert cg._packed_handler.writes == [0, 1 | 20 << 1 | 5 << 6]
+    cg._drive(dict(cp_onehot=8, cp_single_list=[None, 3]))
+    assert cg._packed_handler.writes[-1] == 1 | 3 << 1 | 8 << 6
+    cg._drive(dict(cp_width=8, cp_single_list=[1, 3]))
+    assert len(cg._packed_handler.writes) == 3
+
+
+def test_fifo_drive(width=4):
+    class CoverGroupTest(CoverGroup):
+        cp_width = CoverPoint(BinUniform(width=width))
+        cp_single = CoverPoint(BinSingle(1))
+
+    cg = CoverGroupTest(name="cg_fifo", drive_mode="fifo", fifo_depth=4)
+    assert cg.sv_wire() == (
+        "wire [19:0] cg_fifo_fifo;\n"
+        "wire [2:0] cg_fifo_fifo_count;\n"
+        "logic cg_fifo_cp_single;\n"
+        "logic [3:0] cg_fifo_cp_width;\n"
+        "wire cg_fifo_sample;"
+    )
+    assert cg.sv_sample_event() == (
+        "always@ (cg_fifo_sample) begin\n"
+        "for (int i = 0; i < cg_fifo_fifo_count; i++) begin\n"
+        "cg_fifo_cp_single = cg_fifo_fifo[i * 5 + 0 +: 1];\n"
+        "cg_fifo_cp_width = cg_fifo_fifo[i * 5 + 1 +: 4];\n"
+        "cg_fifo_inst.sample();\n"
+        "end\n"
+        "end"
+    )
+
+    cg._fifo_handler = Handle()
+    cg._fifo_count_handler = Handle()
+    cg._packed_slices = {id(v): (offset, width) for v, offset, width in cg._packed_layout()}
+    cg._packed_width = 5
+    for value in range(6):
+        cg.set(values=dict(), cp_width=value, cp_single=value % 2)
+        cg.sample()
+
+    cg._drive_fifo()
+    assert cg._fifo_count_handler.writes == [4]
+    assert cg._fifo_handler.writes == [sum((v << 1 | v % 2) << (5 * v) for v in range(4))]
+    cg._drive_fifo()
+    assert cg._fifo_count_handler.writes == [4, 2]
+    assert cg._fifo_handler.writes[-1] == (4 << 1) | (5 << 1 | 1) << 5
+    assert cg.queue_depth() == 0
+
+
+def test_sample_on(width=4):
+    class CoverGroupTest(CoverGroup):
+        cp_width = CoverPoint(BinUniform(width=width))
+        cp_onehot = CoverPoint(BinOneHot(width), ref=cp_width)
+        cp_single_list = [CoverPoint(BinSingle(i)) for i in [1, 2]]
+
+    cg = CoverGroupTest(name="cg_sample_on", backend="python")
+    with pytest.raises(AssertionError):
+        cg.sample_on(None, cp_unknown=Handle())
+
+    data, valid = SignalHandle(width), SignalHandle(1)
+    signals = dict(cp_width=data, cp_onehot=data, cp_single_list=[data, valid])
+    handles = [data, valid]
+    for value, enable in [(1, 1), (2, 0), (4, 1), (2, "x"), (8, 1)]:
+        data.value, valid.value = value, enable
+        values = cg._read_signals(handles, valid, signals)
+        if values is not None:
+            cg._sample_with(values)
+    assert cg.cp_onehot.hits == {"bin_0x1": 1, "bin_0x2": 0, "bin_0x4": 1, "bin_0x8": 1}
+    assert cg.cp_single_list[0].hits == {"bin_1": 1}
+    assert cg.cp_single_list[1].hits == {"bin_2": 0}
+
+    assert cg._read_signals(handles, lambda v: v["cp_width"] > 4, signals) == dict(
+        cp_width=8, cp_onehot=8, cp_single_list=[8, 1]
+    )
+    data.value = 3
+    assert cg._read_signals(handles, lambda v: v["cp_width"] > 4, signals) is None
+    data.value = "x" * width
+    assert cg._read_signals(handles, None, signals) == dict(cp_width=None, cp_onehot=None, cp_single_list=[None, 1])
+
+
+def test_drive_changed(width=4):
+    class CoverGroupTest(CoverGroup):
+        cp_width = CoverPoint(BinUniform(width=width))
+        cp_onehot = CoverPoint(BinOneHot(width), ref=cp_width)
+        cp_single_list = [CoverPoint(BinSingle(i)) for i in [1, 20]]
+
+    cg = CoverGroupTest(name="cg_drive")
+    handles = {id(v): Handle() for _, v, _ in cg._traverse_coverpoint() if v.ref is None}
+    for _, v, _ in cg._traverse_coverpoint():
+        if v.ref is None:
+            v._handler = handles[id(v)]
+
+    cg._drive(dict(cp_width=5, cp_single_list=[1, 20]))
+    cg._drive(dict(cp_width=5, cp_single_list=[1, 3]))
+    cg._drive(dict(cp_onehot=8, cp_single_list=[None, np.int64(3)]))
+    assert cg.cp_width._handler.writes == [5, 8]
+    assert cg.cp_single_list[0]._handler.writes == [1]
+    assert cg.cp_single_list[1]._handler.writes == [20, 3]
+    assert cg.drive_skipped == 3
+
+
+def test_merge(width=4):
+    class CoverGroupTest(CoverGroup):
+        cp_width = CoverPoint(BinUniform(width=width))
+        cp_onehot = CoverPoint(BinOneHot(width), ref=cp_width)
+
+    cg_a = CoverGroupTest(name="cg_merge", backend="python")
+    cg_b = CoverGroupTest(name="cg_merge", backend="python")
+    cg_a.sample_many(cp_width=np.array([1, 2]))
+    cg_b.sample_many(cp_width=np.array([2, 3]))
+
+    snapshot = cg_a.snapshot()
+    cg_a.merge(cg_b)
+    assert cg_a.cp_width.counts[:4].tolist() == [0, 1, 2, 1]
+    assert cg_a.cp_onehot.counts.tolist() == [1, 2, 0, 0]
+
+    cg_a.reset()
+    cg_a.merge(snapshot)
+    assert cg_a.cp_onehot.counts.tolist() == [1, 1, 0, 0]
@@ -1,4 +1,5 @@
 import pytest
+import numpy as np
 from enum import Enum
 from cocotbext.fcov import CoverPoint
 from cocotbext.fcov import (
@@ -381,3 +382,174 @@ def test_cp_transition():
         "Ignore Bins": "",
         "Illegal Bins": "",
     }
+
+
+def test_cp_transition_sample():
+    values = [1, 2, 3, 1, 3, 1, 2, 4, 2, 3, 1, 2, 3]
+    # ignored values don't advance transitions, in both sample() and sample_many()
+    for ignore_bins, hits in [(None, 2), ([2], 0), ([4], 2)]:
+        cp_single = CoverPoint(BinTransition([1, 2, 3]), ignore_bins=ignore_bins, name="cp_single", group="cg_python")
+        for value in values:
+            cp_single.sample(value)
+        cp_many = CoverPoint(BinTransition([1, 2, 3]), ignore_bins=ignore_bins, name="cp_many", group="cg_python")
+        cp_many.sample_many(values)
+        assert cp_single.hits == cp_many.hits == {"bin_1_3": hits}
+        assert cp_single.snapshot().tolist() == cp_many.snapshot().tolist()
+
+
+def test_cp_sample():
+    cp = CoverPoint(
+        BinUniform(4, num=0) + BinDefault(),
+        ignore_bins=[5],
+        illegal_bins=[("ILLEGAL", 7)],
+        name="cp_sample",
+        group="cg_python",
+    )
+    assert cp.bin_names == ["bin_0_3[0]", "bin_0_3[1]", "bin_0_3[2]", "bin_0_3[3]", "others"]
+    assert cp.coverage() == 0
+
+    for value in [0, 1, 1, "11", 5, 7, 9, None, "x"]:
+        cp.sample(value)
+    assert cp.hits == {"bin_0_3[0]": 1, "bin_0_3[1]": 2, "bin_0_3[2]": 0, "bin_0_3[3]": 1, "others": 1}
+    assert cp.illegal_hits == {"ILLEGAL": 1}
+    assert cp.coverage() == 75
+
+    cp.reset()
+    assert sum(cp.hits.values()) == 0
+
+    cp = CoverPoint(BinBitwise(3), name="cp_bitwise", group="cg_python")
+    cp.sample(0b101)
+    assert cp.hits == {
+        "bin_0[0]": 0,
+        "bin_0[1]": 1,
+        "bin_1[0]": 1,
+        "bin_1[1]": 0,
+        "bin_2[0]": 0,
+        "bin_2[1]": 1,
+    }
+
+
+def test_cp_counter():
+    cp = CoverPoint(BinUniform(width=16), ignore_bins=[0], illegal_bins=[1], name="cp_counter", group="cg_python")
+    assert cp.counts.dtype == np.int64
+    assert len(cp.snapshot()) == (1 << 16) + 2
+    assert cp.ordinal("bin_0_65535[100]") == 100
+
+    cp.sample_many(np.arange(1 << 16))
+    assert cp.coverage() == 100 * ((1 << 16) - 2) / (1 << 16)
+    snapshot = cp.snapshot()
+
+    other = CoverPoint(BinUniform(width=16), ignore_bins=[0], illegal_bins=[1])
+    other.sample(0)
+    other.sample(1)
+    other.sample(1)
+    cp.merge(other)
+    assert (cp.snapshot() - snapshot).tolist() == [0] * (1 << 16) + [1, 2]
+
+    cp.reset()
+    assert not cp.snapshot().any()
+    with pytest.raises(AssertionError):
+        cp.merge(np.zeros(3, dtype=np.int64))
+
+
+def test_cp_bit_counts():
+    for width in [3, 64, 100, 512]:
+        cp = CoverPoint(BinBitwise(width), name="cp_bitwise", group="cg_python")
+        values = [0, 1, (1 << width) - 1, 1 << (width - 1), 5]
+        for value in values:
+            cp.sample(value)
+        counts = cp.counts.copy()
+
+        cp.reset()
+        cp.sample_many(values, return_hits=False)
+        assert cp.counts.tolist() == counts.tolist()
+        assert cp.bit_counts.shape == (width, 2)
+        assert cp.bit_counts[0].tolist() == [2, 3]
+        assert cp.bit_counts[width - 1].tolist() == [3, 2] if width > 3 else [2, 3]
+
+        cp.reset()
+        rows, ordinals = cp.sample_many(values)
+        assert cp.counts.tolist() == counts.tolist()
+        assert len(rows) == len(ordinals) == width * len(values)
+
+    cp = CoverPoint(BinUniform(width=4))
+    with pytest.raises(AssertionError):
+        cp.bit_counts
+
+
+def test_cp_wildcard():
+    cp = CoverPoint(
+        {"op_load": "4'b1??0", "op_store": ["4'b0??1", 2], "op_any": "8'h??", "op_others": None},
+        illegal_bins={"op_wide": "12'hF??"},
+        name="cp_wildcard",
+        group="cg_python",
+    )
+    assert cp.sv_declare() == (
+        "cp_wildcard: coverpoint cg_python_cp_wildcard {\n"
+        "wildcard bins op_load = {4'b1??0};\n"
+        "wildcard bins op_store = {4'b0??1, 2};\n"
+        "wildcard bins op_any = {8'h??};\n"
+        "bins op_others = default;\n"
+        "wildcard illegal_bins op_wide = {12'hF??};}"
+    )
+
+    values = list(range(1 << 12))
+    for value in values:
+        cp.sample(value)
+    hits = cp.hits
+    assert hits == {"op_load": 4, "op_store": 5, "op_any": 256, "op_others": 3840 - 256}
+    assert cp.illegal_hits == {"op_wide": 256}
+
+    cp.reset()
+    cp.sample_many(values)
+    assert cp.hits == hits
+    assert cp.illegal_hits == {"op_wide": 256}
+
+
+def test_cp_on_illegal():
+    violations = []
+    cp = CoverPoint(
+        BinUniform(width=4),
+        illegal_bins={"ILLEGAL_LOW": [0, 1], "ILLEGAL_ONE": 1},
+        name="cp_illegal",
+        group="cg_python",
+        on_illegal=lambda cp, value, names, time: violations.append((cp.name, value, names, time)),
+    )
+    for value in [2, 1, 3, 0]:
+        cp.sample(value)
+    assert violations == [
+        ("cp_illegal", 1, ["ILLEGAL_LOW", "ILLEGAL_ONE"], None),
+        ("cp_illegal", 0, ["ILLEGAL_LOW"], None),
+    ]
+    assert cp.illegal_hits == {"ILLEGAL_LOW": 2, "ILLEGAL_ONE": 1}
+
+    violations.clear()
+    cp.sample_many(np.array([5, 0, 6, 1]))
+    assert [v[1:3] for v in violations] == [(0, ["ILLEGAL_LOW"]), (1, ["ILLEGAL_LOW", "ILLEGAL_ONE"])]
+
+    violations.clear()
+    assert cp.check(1) == [0, 1]
+    assert len(violations) == 1
+    assert cp.illegal_hits == {"ILLEGAL_LOW": 4, "ILLEGAL_ONE": 2}
+
+    cp.on_illegal = "error"
+    cp.sample(5)
+    with pytest.raises(AssertionError, match="Illegal value 1 of CoverPoint cp_illegal"):
+        cp.sample(1)
+    with pytest.raises(AssertionError, match="row 2 of sampled values"):
+        cp.sample_many([5, 6, 0])
+
+    with pytest.raises(ValueError, match="on_illegal"):
+        CoverPoint(BinUniform(width=4), on_illegal="warn")
+
+
+def test_cp_value_without_signal():
+    cp = CoverPoint(BinUniform(width=2), name="cp_value")
+    assert cp.value is None
+
+    # a coverpoint driven to the simulator needs its signal
+    cp.set_driven(True)
+    with pytest.raises(AssertionError):
+        cp.value
+    cp.value = 1
+    assert cp.value == 1
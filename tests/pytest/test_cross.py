@@ -1,10 +1,12 @@
 import pytest
+import numpy as np
 from itertools import combinations_with_replacement
 from cocotbext.fcov import CoverPoint, Cross
 from cocotbext.fcov import (
     BinUniform,
     BinOneHot,
     BinBitwise,
+    BinDefault,
 )
 
 
@@ -58,3 +60,50 @@ def test_eq():
     assert Cross([cp_uniform, cp_onehot, cp_bitwise]) == Cross([cp_onehot, cp_bitwise, cp_uniform])
     with pytest.raises(AssertionError):
         assert Cross([cp_uniform, cp_onehot]) == Cross([cp_onehot, cp_bitwise])
+
+
+def test_cross_sample():
+    for dense_limit in [1 << 20, 0]:
+        cp_uniform = CoverPoint(BinUniform(3) + BinDefault(), name="cp_uniform")
+        cp_onehot = CoverPoint(BinOneHot(2), name="cp_onehot")
+        cx = Cross([cp_uniform, cp_onehot], name="cx", dense_limit=dense_limit)
+        assert cx.is_dense == (dense_limit > 0)
+
+        for a, b in [(0, 1), (0, 1), (2, 2), (7, 2), (1, 3)]:
+            cx.sample([cp_uniform.sample(a), cp_onehot.sample(b)])
+        assert cx.hits == {
+            ("bin_0_2[0]", "bin_0x1"): 2,
+            ("bin_0_2[2]", "bin_0x2"): 1,
+        }
+        assert list(cx.holes()) == [
+            ("bin_0_2[0]", "bin_0x2"),
+            ("bin_0_2[1]", "bin_0x1"),
+            ("bin_0_2[1]", "bin_0x2"),
+            ("bin_0_2[2]", "bin_0x1"),
+        ]
+        assert cx.coverage() == 100 * 2 / 6
+
+        snapshot = cx.snapshot()
+        cx.reset()
+        cx.sample_many([cp_uniform.sample_many([1, 1, 2, 7]), cp_onehot.sample_many([1, 1, 2, 2])])
+        assert cx.hits == {("bin_0_2[1]", "bin_0x1"): 2, ("bin_0_2[2]", "bin_0x2"): 1}
+        cx.merge(snapshot)
+        assert cx.hits == {
+            ("bin_0_2[0]", "bin_0x1"): 2,
+            ("bin_0_2[1]", "bin_0x1"): 2,
+            ("bin_0_2[2]", "bin_0x2"): 2,
+        }
+
+
+def test_cross_sparse():
+    cp = [CoverPoint(BinUniform(width=16), name=f"cp_{i}") for i in range(4)]
+    cx = Cross(cp, name="cx_wide")
+    assert not cx.is_dense
+
+    values = np.random.default_rng(0).integers(0, 1 << 16, (4, 1000))
+    cx.sample_many([c.sample_many(v) for c, v in zip(cp, values)])
+    cx.sample([c.sample(int(v)) for c, v in zip(cp, values[:, 0])])
+    hits = cx.hits
+    assert sum(hits.values()) == 1001
+    assert hits[tuple(f"bin_0_65535[{v}]" for v in values[:, 0])] == 2
+    assert cx.coverage() == 100 * len(hits) / (1 << 64)
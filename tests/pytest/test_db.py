@@ -0,0 +1,316 @@
+import pytest
+import multiprocessing
+import numpy as np
+
+from cocotbext.fcov import CoverageModel, CoverageCollector, CoverageDB, HitIndex
+from cocotbext.fcov import CoverPoint, Cross, CoverGroup
+from cocotbext.fcov import BinUniform, BinOneHot, BinBitwise
+from cocotbext.fcov import db
+
+
+class CoverGroupTest(CoverGroup):
+    cp_width = CoverPoint(BinUniform(width=2), ignore_bins=[3])
+    cp_onehot = CoverPoint(BinOneHot(2), ref=cp_width)
+    cp_bitwise = CoverPoint(BinBitwise(2), ref=cp_width)
+    cx_dense = Cross([cp_width, cp_onehot])
+    cx_sparse = Cross([cp_width, cp_bitwise], dense_limit=1)
+
+
+class CoverageTest(CoverageModel):
+    cg_a = CoverGroupTest()
+    cg_list = [CoverGroupTest() for _ in range(2)]
+
+
+def make_model(values):
+    model = CoverageCollector(None, {"cov_db": CoverageTest()}).cov_db
+    for value in values:
+        model.cg_a(cp_width=value)
+        model.cg_a.sample()
+    model.cg_list[1].sample_many(cp_width=values)
+    return model
+
+
+def test_compact_names():
+    names = ["a", "b[0]", "b[1]", "b[2]", "c[0]", "c[2]", "d[1]", "e[0]"]
+    compact = db.compact_names(names)
+    assert compact == ["a", ["b", 3], ["c", 1], "c[2]", "d[1]", ["e", 1]]
+    assert db.expand_names(compact) == names
+
+
+def test_db(tmp_path):
+    model = make_model([0, 1, 2, 3, 1])
+    path = tmp_path / "test.fcovdb"
+    db.write(path, model, meta={"test": "test_db", "seed": 1})
+
+    cov_db = CoverageDB(path)
+    assert cov_db.meta == {"test": "test_db", "seed": 1}
+    assert cov_db.fingerprint == db.fingerprint(db.structure(model))
+    assert len(cov_db) == 3 * 5
+    assert ("cov_db", "cg_a", "cp_width") in cov_db
+    assert cov_db.data_offset % db.ALIGN == 0
+
+    counts = cov_db.counts("cov_db", "cg_a", "cp_width")
+    assert isinstance(counts.base, np.memmap)
+    assert counts.tolist() == model.cg_a.cp_width.snapshot().tolist() == [1, 2, 1, 0, 1]
+    assert cov_db.bin_names("cov_db", "cg_a", "cp_bitwise") == model.cg_a.cp_bitwise.bin_names
+    assert cov_db.hits("cov_db", "cg_a", "cp_onehot") == {"bin_0x1": 2, "bin_0x2": 1}
+    assert cov_db.hits("cov_db", "cg_list_1", "cx_dense") == model.cg_list[1].cx_dense.hits
+    assert cov_db.hits("cov_db", "cg_a", "cx_sparse") == model.cg_a.cx_sparse.hits
+    assert cov_db.counts("cov_db", "cg_a", "cx_sparse") == model.cg_a.cx_sparse.snapshot()
+
+    other = CoverageTest("cov_db")
+    other.merge(cov_db.snapshot("cov_db"))
+    assert other.coverage() == model.coverage()
+
+
+def test_db_fingerprint(tmp_path):
+    class CoverGroupOther(CoverGroup):
+        cp_width = CoverPoint(BinUniform(width=3))
+
+    class OtherCoverage(CoverageModel):
+        cg_a = CoverGroupOther()
+        cg_list = [CoverGroupTest() for _ in range(2)]
+
+    model = make_model([0])
+    assert db.fingerprint(db.structure(model)) == db.fingerprint(db.structure(CoverageTest("cov_db")))
+    assert db.fingerprint(db.structure(model)) != db.fingerprint(db.structure(OtherCoverage("cov_db")))
+
+
+def test_db_merge(tmp_path):
+    values = [[0, 1], [2, 3, 1], [1], [0, 0, 2]]
+    paths = []
+    for i, v in enumerate(values):
+        paths.append(tmp_path / f"test_{i}.fcovdb")
+        db.write(paths[-1], make_model(v), meta={"test": i})
+    model = make_model([i for v in values for i in v])
+
+    for jobs in [1, 2]:
+        assert db.merge(paths, tmp_path / "merged.fcovdb", jobs=jobs) == len(paths)
+        cov_db = CoverageDB(tmp_path / "merged.fcovdb")
+        assert cov_db.meta == {"merged": len(paths)}
+        assert cov_db.fingerprint == db.fingerprint(db.structure(model))
+        for _, cg, _ in model._traverse_covergroup():
+            for name, counts in cg.snapshot().items():
+                if isinstance(counts, dict):
+                    assert cov_db.counts("cov_db", cg.name, name) == counts
+                else:
+                    assert cov_db.counts("cov_db", cg.name, name).tolist() == counts.tolist()
+
+    class CoverageOther(CoverageModel):
+        cg_a = CoverGroupTest()
+
+    db.write(tmp_path / "other.fcovdb", CoverageOther("cov_db"))
+    with pytest.raises(AssertionError, match="coverage models are different"):
+        db.merge(paths + [tmp_path / "other.fcovdb"], tmp_path / "merged.fcovdb", jobs=1)
+
+
+def test_hit_index(tmp_path):
+    values = [[0], [1, 2], [3], [2]] * 3
+    paths = []
+    for i, v in enumerate(values):
+        paths.append(tmp_path / f"test_{i}.fcovdb")
+        db.write(paths[-1], make_model(v), meta={"test": f"test_{i}"})
+
+    for jobs in [1, 2]:
+        db.merge(paths, tmp_path / "merged.fcovdb", jobs=jobs, index=tmp_path / "merged.fcovidx")
+        index = HitIndex(tmp_path / "merged.fcovidx")
+        assert index.fingerprint == CoverageDB(tmp_path / "merged.fcovdb").fingerprint
+        assert index.tests == [f"test_{i}" for i in range(len(values))]
+        assert index.tests_hitting("cov_db", "cg_a", "cp_width", "bin_0_3[0]") == ["test_0", "test_4", "test_8"]
+        assert index.tests_hitting("cov_db", "cg_a", "cp_width", "bin_0_3[2]") == [
+            f"test_{i}" for i in [1, 3, 5, 7, 9, 11]
+        ]
+        assert index.tests_hitting("cov_db", "cg_list_0", "cp_width", "bin_0_3[0]") == []
+        assert index.tests_hitting("cov_db", "cg_a", "cx_dense", ("bin_0_3[1]", "bin_0x1")) == [
+            "test_1",
+            "test_5",
+            "test_9",
+        ]
+        assert index.tests_hitting("cov_db", "cg_a", "cx_sparse", ("bin_0_3[1]", "bin_0[1]")) == [
+            "test_1",
+            "test_5",
+            "test_9",
+        ]
+        with pytest.raises(AssertionError):
+            index.tests_hitting("cov_db", "cg_a", "cp_width", "bin_4")
+
+
+def test_rank(tmp_path):
+    values = [[0], [0, 1], [1, 2, 3], [3], [0, 1, 2, 3], [2]]
+    paths = []
+    for i, v in enumerate(values):
+        paths.append(tmp_path / f"test_{i}.fcovdb")
+        db.write(paths[-1], make_model(v), meta={"test": f"test_{i}"})
+
+    assert db.popcount(np.array([[0, 1, 255], [3, 0, 128]], dtype=np.uint8)).tolist() == [9, 3]
+    for jobs in [1, 2]:
+        ranking = db.rank(paths, jobs=jobs)
+        assert [test for test, *_ in ranking] == ["test_4"]
+        _, new, cumulative, coverage = ranking[0]
+        assert new == cumulative
+
+    ranking = db.rank(paths[:4], jobs=1)
+    assert [test for test, *_ in ranking] == ["test_2", "test_0"]
+    assert ranking[-1][2] == db.rank(paths, jobs=1)[-1][2]
+    assert 0 < ranking[0][3] < ranking[1][3] <= 100
+
+    # default bins are not covered, as coverage() of models
+    class CoverGroupDefault(CoverGroup):
+        cp_default = CoverPoint([("bin_a", 0), ("bin_b", 1), ("others", None)])
+        cp_width = CoverPoint(BinUniform(width=1))
+        cx_dense = Cross([cp_default, cp_width])
+        cx_sparse = Cross([cp_width, cp_default], dense_limit=1)
+
+    class CoverageDefault(CoverageModel):
+        cg = CoverGroupDefault()
+
+    model = CoverageCollector(None, {"cov_default": CoverageDefault()}).cov_default
+    model.cg.sample_many(cp_default=[0, 0, 1, 1, 2], cp_width=[0, 1, 0, 1, 0])
+    assert model.coverage() == 100
+    db.write(tmp_path / "default.fcovdb", model)
+    assert db.rank([tmp_path / "default.fcovdb"], jobs=1)[0][1:] == (2 + 2 + 4 + 4, 12, 100)
+
+
+class CoverGroupShared(CoverGroup):
+    cp_width = CoverPoint(BinUniform(width=2))
+    cp_onehot = CoverPoint(BinOneHot(2), ref=cp_width)
+    cx_dense = Cross([cp_width, cp_onehot])
+
+
+class CoverageShared(CoverageModel):
+    cg_a = CoverGroupShared()
+
+
+def sample_shared(path, values, flush):
+    collector = CoverageCollector(
+        None, {"cov_shared": CoverageShared()}, shared=path, flush_samples=2 if flush == "samples" else None
+    )
+    for value in values:
+        collector.cov_shared.cg_a.sample_many(cp_width=[value])
+        if flush == "flush":
+            collector.flush()
+    if flush == "close":
+        collector.close()
+    # otherwise, counts not flushed yet are flushed when the collector is collected
+
+
+def test_shared_counters(tmp_path):
+    path = str(tmp_path / "shared.fcovdb")
+    values = [[0, 1, 2], [1, 1], [3], [2, 0]]
+    flush = ["flush", "samples", "close", None]
+    processes = [multiprocessing.Process(target=sample_shared, args=(path, v, f)) for v, f in zip(values, flush)]
+    for p in processes:
+        p.start()
+    for p in processes:
+        p.join()
+        assert p.exitcode == 0
+
+    collector = CoverageCollector(None, {"cov_shared": CoverageShared()}, shared=path)
+    cg = collector.cov_shared.cg_a
+    assert cg.cp_width.snapshot().tolist() == [0, 0, 0, 0]
+    assert collector.shared.snapshot("cov_shared")["cg_a"]["cp_width"].tolist() == [2, 3, 2, 1]
+
+    cg.sample_many(cp_width=[1, 2])
+    assert collector.flush() == 6
+    assert collector.flush() == 0
+    cg.reset()
+    cg.sample_many(cp_width=[1])
+    assert collector.flush() == 3
+    collector.cov_shared.merge(collector.shared.snapshot("cov_shared"))
+    assert cg.cp_width.snapshot().tolist() == [2, 6, 3, 1]
+
+    # counts not flushed before reset are flushed at the next flush
+    shared = db.SharedCounters(tmp_path / "reset.fcovdb", CoverageShared("cov_shared"))
+    cp = shared.models[0].cg_a.cp_width
+    cp.sample_many([0, 1, 2])
+    shared.flush()
+    cp.sample_many([0, 1])
+    cp.reset()
+    cp.sample_many([3])
+    cp.reset()
+    cp.sample_many([0])
+    shared.flush()
+    assert shared.snapshot("cov_shared")["cg_a"]["cp_width"].tolist() == [3, 2, 1, 1]
+
+    with pytest.raises(AssertionError, match="sparse cross"):
+        db.SharedCounters(tmp_path / "sparse.fcovdb", make_model([0]))
+    with pytest.raises(AssertionError, match="different coverage models"):
+        db.SharedCounters(path, CoverageShared("cov_other"))
+
+
+def test_checkpoint(tmp_path):
+    path = tmp_path / "checkpoint.fcovdb"
+    collector = CoverageCollector(None, {"cov_shared": CoverageShared()}, checkpoint=path, checkpoint_samples=3)
+    cg = collector.cov_shared.cg_a
+    assert CoverageDB(path).counts("cov_shared", "cg_a", "cp_width").tolist() == [0, 0, 0, 0]
+
+    cg(cp_width=1)
+    cg.sample()
+    cg(cp_width=2)
+    cg.sample()
+    assert cg.samples == 2
+    assert CoverageDB(path).counts("cov_shared", "cg_a", "cp_width").tolist() == [0, 0, 0, 0]
+    cg.sample_many(cp_width=[3])
+    assert collector.checkpoint_db.saves == 2
+    assert CoverageDB(path).counts("cov_shared", "cg_a", "cp_width").tolist() == [0, 1, 1, 1]
+
+    cg.cp_onehot.sample(1)
+    assert collector.checkpoint() == 1
+    assert collector.checkpoint() == 0
+    cov_db = CoverageDB(path)
+    assert cov_db.hits("cov_shared", "cg_a", "cp_onehot") == {"bin_0x1": 2, "bin_0x2": 1}
+    assert cov_db.hits("cov_shared", "cg_a", "cx_dense") == cg.cx_dense.hits
+
+    path = tmp_path / "sparse.fcovdb"
+    collector = CoverageCollector(None, {"cov_db": CoverageTest()}, checkpoint=path)
+    inode = path.stat().st_ino
+    cg = collector.cov_db.cg_a
+    cg.sample_many(cp_width=[1, 2])
+    assert collector.checkpoint() == 5
+    assert CoverageDB(path).hits("cov_db", "cg_a", "cx_sparse") == cg.cx_sparse.hits
+
+    # dense counters are patched in place, and sparse crosses are rewritten at the end of the same file
+    sizes = []
+    for values in [[0], [3, 1], [2], [0, 1, 2]]:
+        cg.sample_many(cp_width=values)
+        assert collector.checkpoint() == 5
+        cov_db = CoverageDB(path)
+        assert cov_db.hits("cov_db", "cg_a", "cx_sparse") == cg.cx_sparse.hits
+        assert cov_db.counts("cov_db", "cg_a", "cp_width").tolist() == cg.cp_width.snapshot().tolist()
+        sizes.append(path.stat().st_size)
+    assert path.stat().st_ino == inode
+    # at most two regions of sparse crosses, with keys and counts of 4 * 4 cross bins at most
+    assert max(sizes) <= cov_db.data_offset + cov_db.dense_size * 8 + 2 * (4 * 4 * 2 * 8)
+    other = CoverageTest("cov_db")
+    other.merge(cov_db.snapshot("cov_db"))
+    assert other.snapshot()["cg_a"]["cx_sparse"] == cg.cx_sparse.snapshot()
+
+
+def test_diff(tmp_path):
+    db.write(tmp_path / "a.fcovdb", make_model([0, 1, 1]))
+    db.write(tmp_path / "b.fcovdb", make_model([1, 2]))
+
+    changes = db.diff(tmp_path / "a.fcovdb", tmp_path / "b.fcovdb")
+    cg_a = [(c["name"], c["bin"], c["change"]) for c in changes if c["group"] == "cg_a"]
+    assert cg_a == [
+        ("cp_bitwise", "bin_1[1]", "gained"),
+        ("cp_onehot", "bin_0x2", "gained"),
+        ("cp_width", "bin_0_3[0]", "lost"),
+        ("cp_width", "bin_0_3[2]", "gained"),
+        ("cx_dense", ["bin_0_3[2]", "bin_0x2"], "gained"),
+        ("cx_sparse", ["bin_0_3[0]", "bin_0[0]"], "lost"),
+        ("cx_sparse", ["bin_0_3[0]", "bin_1[0]"], "lost"),
+        ("cx_sparse", ["bin_0_3[2]", "bin_0[0]"], "gained"),
+        ("cx_sparse", ["bin_0_3[2]", "bin_1[1]"], "gained"),
+    ]
+    assert db.diff(tmp_path / "a.fcovdb", tmp_path / "a.fcovdb") == []
+
+    changes = db.diff(tmp_path / "a.fcovdb", tmp_path / "b.fcovdb", counts=True)
+    decreased = {"model": "cov_db", "group": "cg_a", "name": "cp_width", "bin": "bin_0_3[1]", "a": 2, "b": 1}
+    assert {**decreased, "change": "decreased"} in changes
+    assert "| cov_db | cg_a | cx_dense | bin_0_3[2], bin_0x2 | 0 | 1 | gained |" in db.diff_markdown(changes)
+
+    db.write(tmp_path / "c.fcovdb", CoverageShared("cov_db"))
+    changes = db.diff(tmp_path / "a.fcovdb", tmp_path / "c.fcovdb")
+    assert {"model": "cov_db", "group": "cg_a", "name": "cx_sparse", "bin": None, "change": "removed"} in changes
+    assert {"model": "cov_db", "group": "cg_a", "name": "cp_width", "bin": None, "change": "changed"} in changes
@@ -0,0 +1,64 @@
+import numpy as np
+
+from cocotbext.fcov import CoverageModel, CoverageCollector
+from cocotbext.fcov import CoverPoint, Cross, CoverGroup
+from cocotbext.fcov import BinUniform, BinOneHot, BinTransition
+from cocotbext.fcov import trace
+
+
+def test_trace(tmp_path):
+    class CoverGroupTrace(CoverGroup):
+        cp_width = CoverPoint(BinUniform(width=2))
+        cp_transition = CoverPoint(BinTransition((1, 2, 3)), ref=cp_width)
+        cp_list = [CoverPoint(BinUniform(4)) for _ in range(2)]
+        cp_wide = CoverPoint(BinUniform(width=2), width=80)
+        cx = Cross([cp_width, cp_list[1]])
+
+    class CoverGroupEdited(CoverGroup):
+        cp_width = CoverPoint(BinUniform(width=2, num=2))
+        cp_onehot = CoverPoint(BinOneHot(2), ref=cp_width)
+
+    class CoverageTrace(CoverageModel):
+        cg = CoverGroupTrace()
+
+    class CoverageEdited(CoverageModel):
+        cg = CoverGroupEdited()
+
+    path = tmp_path / "trace.fcovtrc"
+    collector = CoverageCollector(None, {"cov_trace": CoverageTrace()}, trace=path)
+    cg = collector.cov_trace.cg
+    collector.trace.chunk_size = 4
+    for value in [0, 1, 2, 3, None, 2]:
+        cg(cp_width=value, cp_list=[value, 3], cp_wide=1 << 79 if value == 3 else value)
+        cg.sample()
+    cp_width = np.array([1, 2, 3])
+    cg.sample_many(cp_width=cp_width, cp_list=[[0, 1, 2], [3, 3, 3]], cp_wide=[0, 1 << 70, 2])
+    cp_width[:] = 0
+    collector.close()
+    assert collector.trace.rows == 9
+
+    chunks = list(trace.read(path))
+    assert [len(columns["cp_width"]) for *_, columns in chunks] == [4, 5]
+    assert chunks[1][2]["cp_width"].mask.tolist() == [True, False, False, False, False]
+    assert chunks[0][2]["cp_wide"][3] == 1 << 79
+    assert chunks[0][2]["cp_transition"].tolist() == [0, 1, 2, 3]
+
+    replayed = CoverageTrace("cov_trace")
+    assert trace.replay(path, replayed) == 9
+    assert replayed.cg.snapshot().keys() == cg.snapshot().keys()
+    for name, counts in cg.snapshot().items():
+        assert replayed.cg.snapshot()[name].tolist() == counts.tolist()
+
+    edited = CoverageEdited("cov_trace")
+    trace.replay(path, edited)
+    assert edited.cg.cp_width.hits == {"bin_0_3[0]": 3, "bin_0_3[1]": 5}
+    assert edited.cg.cp_onehot.hits == {"bin_0x1": 2, "bin_0x2": 3}
+
+    with open(path, "r+b") as f:
+        f.truncate(f.seek(0, 2) - 10)
+    assert len(list(trace.read(path))) == 1
+
+    # samples after close are not recorded
+    cg.sample()
+    collector.close()
+    assert collector.trace.rows == 9
@@ -0,0 +1,50 @@
+from xml.etree import ElementTree
+
+from cocotbext.fcov import CoverageDB, CoverPoint, CoverGroup
+from cocotbext.fcov import db, ucis
+from test_db import make_model
+
+
+def test_ucis(tmp_path):
+    model = make_model([0, 1, 2, 3, 1])
+    db.write(tmp_path / "a.fcovdb", model, meta={"test": "test_ucis"})
+    ucis.write(tmp_path / "a.xml", tmp_path / "a.fcovdb")
+    ucis.write(tmp_path / "b.xml", model, test="test_ucis")
+
+    root = ElementTree.parse(tmp_path / "a.xml").getroot()
+    ns = {"ucis": ucis.UCIS_NS}
+    assert root.find("ucis:historyNodes", ns).get("logicalName") == "test_ucis"
+    cg = root.find("ucis:instanceCoverages/ucis:covergroupCoverage/ucis:cgInstance[@name='cg_a']", ns)
+    bins = cg.findall("ucis:coverpoint[@name='cp_width']/ucis:coverpointBin", ns)
+    assert [(b.get("name"), b.get("type")) for b in bins][-2:] == [("bin_0_3[3]", "bins"), ("bin_3", "ignore")]
+    assert len(cg.findall("ucis:cross[@name='cx_dense']/ucis:crossBin", ns)) == 4 * 2
+    cross_bin = cg.find("ucis:cross[@name='cx_dense']/ucis:crossBin[@name='<bin_0_3[1],bin_0x1>']", ns)
+    assert cross_bin.find("ucis:contents", ns).get("coverageCount") == "2"
+
+    # bins written from models have value ranges, and keys are unique in their parent
+    cg = ElementTree.parse(tmp_path / "b.xml").getroot().find(".//ucis:cgInstance[@name='cg_a']", ns)
+    bins = cg.findall("ucis:coverpoint[@name='cp_width']/ucis:coverpointBin", ns)
+    ranges = [[(r.get("from"), r.get("to")) for r in b.findall("ucis:range", ns)] for b in bins]
+    assert ranges == [[("0", "0")], [("1", "1")], [("2", "2")], [("3", "3")], [("3", "3")]]
+    items = cg.findall("ucis:coverpoint", ns) + cg.findall("ucis:cross", ns)
+    assert sorted(int(e.get("key")) for e in items) == list(range(len(items)))
+    groups = ElementTree.parse(tmp_path / "b.xml").getroot().findall(".//ucis:cgInstance", ns)
+    assert sorted(int(e.get("key")) for e in groups) == list(range(len(groups)))
+    # a database has no values of bins
+    bins = root.findall(".//ucis:coverpointBin/ucis:range", ns)
+    assert {(r.get("from"), r.get("to")) for r in bins} == {("-1", "-1")}
+
+    for xml in ["a.xml", "b.xml"]:
+        ucis.read(tmp_path / xml, tmp_path / "c.fcovdb")
+        cov_db = CoverageDB(tmp_path / "c.fcovdb")
+        assert cov_db.meta == {"test": "test_ucis"}
+        assert cov_db.fingerprint == CoverageDB(tmp_path / "a.fcovdb").fingerprint
+        assert db.diff(tmp_path / "a.fcovdb", cov_db, counts=True) == []
+
+    # default bins are kept as bins of type default
+    class CoverGroupDefault(CoverGroup):
+        cp_default = CoverPoint([("bin_a", 0), ("others", None)])
+
+    ucis.write(tmp_path / "d.xml", CoverGroupDefault(name="cg_default"))
+    ucis.read(tmp_path / "d.xml", tmp_path / "d.fcovdb")
+    assert CoverageDB(tmp_path / "d.fcovdb").entry("", "cg_default", "cp_default")["default"] == [1]